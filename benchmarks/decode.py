@@ -0,0 +1,72 @@
+"""CPU time and peak memory of decoding one list page, SDK models vs raw records.
+
+Builds a page of tickets and of contacts from ``benchmarks/fixtures`` and decodes
+it repeatedly with the generated SDK (``ApiClient.deserialize``) and with the
+slotted records used when ``LIVEAGENT_RAW_RECORDS`` is on. Needs the
+``liveagent_api`` package; orjson is used for the records if it is installed.
+
+    python benchmarks/decode.py --page-size 100 --runs 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import liveagent_api
+
+from liveagent_mcp.records import ContactRecord, TicketRecord, loads
+from liveagent_mcp.transport import _RawResponse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def page(name: str, size: int) -> bytes:
+    with open(os.path.join(FIXTURES, f"{name}.json"), encoding="utf-8") as f:
+        records = json.load(f)
+    items = []
+    for index in range(size):
+        item = dict(records[index % len(records)])
+        item["id"] = f"{name[0]}{index:06d}"
+        items.append(item)
+    return json.dumps(items).encode()
+
+
+def measure(decode: Callable[[], object], runs: int) -> Tuple[float, float]:
+    # Mean CPU milliseconds per page, then peak kilobytes of one decode
+    start = time.process_time()
+    for _ in range(runs):
+        decode()
+    cpu = (time.process_time() - start) / runs * 1000
+    tracemalloc.start()
+    result = decode()
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    del result
+    return cpu, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100, help="records per page (default: 100)")
+    parser.add_argument("--runs", type=int, default=200, help="decodes per measurement (default: 200)")
+    args = parser.parse_args()
+
+    sdk = liveagent_api.ApiClient(liveagent_api.Configuration())
+    print(f"json decoder: {loads.__module__}, page size {args.page_size}\n")
+    print(f"{'endpoint':<10}{'decoder':<10}{'cpu ms':>10}{'peak KiB':>12}")
+    for name, response_type, record in (("tickets", "list[TicketListItem]", TicketRecord),
+                                        ("contacts", "list[ContactListItem]", ContactRecord)):
+        content = page(name, args.page_size)
+        text = content.decode()
+        for decoder, decode in (("sdk", lambda: sdk.deserialize(_RawResponse(text), response_type)),
+                                ("records", lambda: record.from_json(content))):
+            cpu, peak = measure(decode, args.runs)
+            print(f"{name:<10}{decoder:<10}{cpu:>10.3f}{peak:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
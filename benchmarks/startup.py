@@ -0,0 +1,91 @@
+"""Cold-start benchmark for the LiveAgent MCP server.
+
+Measures, over several fresh processes:
+
+- import time of ``liveagent_mcp.server``
+- time from spawning the stdio server to a completed ``initialize``
+- latency of the first and of repeated ``list_tools`` calls
+
+No LiveAgent instance is needed; placeholder credentials are used unless
+``LIVEAGENT_BASE_URL``/``LIVEAGENT_V3_API_KEY`` are already set.
+
+    python benchmarks/startup.py --runs 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+
+def server_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("LIVEAGENT_BASE_URL", "http://127.0.0.1:9")
+    env.setdefault("LIVEAGENT_V3_API_KEY", "benchmark")
+    return env
+
+
+def measure_import(runs: int) -> list:
+    code = "import time; t = time.perf_counter(); import liveagent_mcp.server; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], env=server_env(), capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip()))
+    return samples
+
+
+async def measure_session(list_calls: int) -> tuple:
+    params = StdioServerParameters(
+        command=sys.executable, args=["-m", "liveagent_mcp.server"], env=server_env()
+    )
+    with open(os.devnull, "w") as devnull:
+        start = time.perf_counter()
+        async with stdio_client(params, errlog=devnull) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                initialized = time.perf_counter() - start
+
+                latencies = []
+                for _ in range(list_calls):
+                    t = time.perf_counter()
+                    await session.list_tools()
+                    latencies.append(time.perf_counter() - t)
+    return initialized, latencies[0], latencies[1:]
+
+
+def report(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<28} median {statistics.median(samples) * 1000:8.2f} ms   "
+          f"p95 {p95 * 1000:8.2f} ms   min {samples[0] * 1000:8.2f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh server processes to start (default: 5)")
+    parser.add_argument("--list-calls", type=int, default=20, help="list_tools calls per process (default: 20)")
+    args = parser.parse_args()
+
+    imports = measure_import(args.runs)
+    initialize, first_list, repeated_list = [], [], []
+    for _ in range(args.runs):
+        init_time, first, repeated = await measure_session(max(2, args.list_calls))
+        initialize.append(init_time)
+        first_list.append(first)
+        repeated_list.extend(repeated)
+
+    report("import liveagent_mcp.server", imports)
+    report("spawn -> initialize", initialize)
+    report("first list_tools", first_list)
+    report("repeated list_tools", repeated_list)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
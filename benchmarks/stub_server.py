@@ -0,0 +1,262 @@
+"""Local stand-in for the LiveAgent ``/api/v3`` REST API used by the benchmarks.
+
+Serves the recorded payloads in ``benchmarks/fixtures`` (tickets, messages, agents,
+contacts, departments, chats, calls), repeated with generated IDs up to the configured record
+counts, so list endpoints page like the real API. Latency and errors can be
+injected to see how the server behaves under a slow or failing upstream.
+
+Run it on its own to point a real server (or a client) at it:
+
+    python benchmarks/stub_server.py --port 8081 --latency 0.05 --error-rate 0.01
+    LIVEAGENT_BASE_URL=http://127.0.0.1:8081 LIVEAGENT_V3_API_KEY=x liveagent-mcp
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_TICKET_PATH = re.compile(r"^/api/v3/tickets/([^/]+)$")
+_MESSAGES_PATH = re.compile(r"^/api/v3/tickets/([^/]+)/messages$")
+_AGENT_PATH = re.compile(r"^/api/v3/agents/([^/]+)$")
+_CONTACT_PATH = re.compile(r"^/api/v3/contacts/([^/]+)$")
+
+_REASONS = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+def load_fixture(name: str) -> List[Dict[str, Any]]:
+    with open(os.path.join(FIXTURES_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class StubLiveAgent:
+    """Fixture-backed fake of the LiveAgent v3 API with injectable latency and errors.
+
+    ``latency`` is added to every response plus a uniform random ``jitter``.
+    ``error_rate`` and ``throttle_rate`` are the fractions of requests answered
+    with 500 and 429. ``requests`` counts handled requests per ``METHOD path``.
+    """
+
+    def __init__(self, tickets: int = 5000, contacts: int = 2000, messages_per_ticket: int = 12,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 0):
+        self.ticket_count = tickets
+        self.contact_count = contacts
+        self.messages_per_ticket = messages_per_ticket
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.requests: Counter = Counter()
+        self._random = random.Random(seed)
+        self._tickets = load_fixture("tickets")
+        self._contacts = load_fixture("contacts")
+        self._agents = load_fixture("agents")
+        self._departments = load_fixture("departments")
+        self._messages = load_fixture("messages")
+        # Live chats and calls are served as they are; tests may change them between polls
+        self.chats = load_fixture("chats")
+        self.calls = load_fixture("calls")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+
+    # Records
+
+    def ticket(self, index: int) -> Dict[str, Any]:
+        record = dict(self._tickets[index % len(self._tickets)])
+        record["id"] = f"t{index:06d}"
+        record["code"] = f"{record['code'][:4]}{index:06d}"
+        record["subject"] = f"{record['subject']} #{index}"
+        return record
+
+    def contact(self, index: int) -> Dict[str, Any]:
+        record = dict(self._contacts[index % len(self._contacts)])
+        local, _, domain = record["email"].partition("@")
+        record["id"] = f"c{index:06d}"
+        record["email"] = f"{local}.{index}@{domain}"
+        record["emails"] = [record["email"]] + record["emails"][1:]
+        return record
+
+    def message_groups(self, ticket_id: str) -> List[Dict[str, Any]]:
+        groups = []
+        for i in range(self.messages_per_ticket):
+            group = copy.deepcopy(self._messages[i % len(self._messages)])
+            group["id"] = f"{ticket_id}-g{i}"
+            for j, message in enumerate(group["messages"]):
+                message["id"] = f"{ticket_id}-m{i}-{j}"
+            groups.append(group)
+        return groups
+
+    @staticmethod
+    def _index(record_id: str, prefix: str, count: int) -> Optional[int]:
+        if record_id.startswith(prefix) and record_id[1:].isdigit():
+            index = int(record_id[1:])
+            if index < count:
+                return index
+        return None
+
+    @staticmethod
+    def _page(query: Dict[str, str], total: int) -> range:
+        per_page = int(query.get("_perPage", 10))
+        if "_from" in query and "_page" not in query:
+            start = int(query["_from"])
+        else:
+            start = (int(query.get("_page", 1)) - 1) * per_page
+        return range(max(0, start), min(start + per_page, total))
+
+    # Routing
+
+    def route(self, method: str, path: str, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        if path == "/api/v3/tickets":
+            if method == "POST":
+                return 200, {**self.ticket(0), **json.loads(body or b"{}"), "id": "tnew"}
+            return 200, [self.ticket(i) for i in self._page(query, self.ticket_count)]
+        match = _MESSAGES_PATH.match(path)
+        if match:
+            groups = self.message_groups(match.group(1))
+            return 200, [groups[i] for i in self._page(query, len(groups))]
+        match = _TICKET_PATH.match(path)
+        if match:
+            index = self._index(match.group(1), "t", self.ticket_count)
+            if index is None:
+                return 404, {"message": "Ticket not found"}
+            ticket = self.ticket(index)
+            if method == "PUT":
+                ticket.update(json.loads(body or b"{}"))
+            return 200, ticket
+        if path == "/api/v3/agents":
+            return 200, [self._agents[i] for i in self._page(query, len(self._agents))]
+        match = _AGENT_PATH.match(path)
+        if match:
+            agent = next((a for a in self._agents if a["id"] == match.group(1)), None)
+            return (200, agent) if agent else (404, {"message": "Agent not found"})
+        if path == "/api/v3/contacts":
+            if method == "POST":
+                return 200, {**self.contact(0), **json.loads(body or b"{}"), "id": "cnew"}
+            return 200, [self.contact(i) for i in self._page(query, self.contact_count)]
+        match = _CONTACT_PATH.match(path)
+        if match:
+            index = self._index(match.group(1), "c", self.contact_count)
+            return (200, self.contact(index)) if index is not None else (404, {"message": "Contact not found"})
+        if path == "/api/v3/departments":
+            return 200, self._departments
+        if path == "/api/v3/chats":
+            return 200, [self.chats[i] for i in self._page(query, len(self.chats))]
+        if path == "/api/v3/calls":
+            return 200, [self.calls[i] for i in self._page(query, len(self.calls))]
+        return 404, {"message": "Not found"}
+
+    async def respond(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        url = urlsplit(target)
+        path = unquote(url.path)
+        self.requests[f"{method} {re.sub(r'/(t|c)[0-9]{6}', r'/{id}', path)}"] += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self._random.random()
+        if roll < self.error_rate:
+            return 500, {"message": "Injected error"}
+        if roll < self.error_rate + self.throttle_rate:
+            return 429, {"message": "Injected throttling"}
+        return self.route(method, path, dict(parse_qsl(url.query)), body)
+
+    # HTTP/1.1 with keep-alive, just enough for httpx
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, payload = await self.respond(method, target, body)
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Cancelled by close(); ending normally keeps asyncio from logging it
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start listening and return the base URL to use as ``LIVEAGENT_BASE_URL``."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise keep their handlers waiting
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--tickets", type=int, default=5000, help="tickets served by the stub (default: 5000)")
+    parser.add_argument("--contacts", type=int, default=2000, help="contacts served by the stub (default: 2000)")
+    parser.add_argument("--messages-per-ticket", type=int, default=12, help="message groups per ticket (default: 12)")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every upstream response (default: 0.02)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="extra random latency up to this many seconds (default: 0.01)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500 (default: 0)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429 (default: 0)")
+
+
+def from_arguments(args: argparse.Namespace) -> StubLiveAgent:
+    return StubLiveAgent(
+        tickets=args.tickets, contacts=args.contacts, messages_per_ticket=args.messages_per_ticket,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    stub = from_arguments(args)
+    print(f"Stub LiveAgent API on {await stub.start(args.host, args.port)}/api/v3")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,238 @@
+"""Throughput and latency benchmark of the tools against a local stub LiveAgent API.
+
+Starts ``stub_server.StubLiveAgent`` and drives tool calls through a real MCP
+client session. By default the server is spawned over stdio like in production.
+With ``--transport memory`` it runs in-process over the in-memory transport,
+which leaves out process and pipe overhead. Each selected tool is run at every
+concurrency level, and the report gives p50/p95/p99 latency, calls per second,
+errors and upstream requests per call.
+
+    python benchmarks/tools.py --concurrency 1,8,32 --calls 200
+    python benchmarks/tools.py --output baseline.json
+    python benchmarks/tools.py --baseline baseline.json   # exits 1 on regressions
+
+Results saved with ``--output`` can be compared by a later run with ``--baseline``.
+The comparison flags tools whose p95 latency grew, or whose throughput dropped,
+by more than ``--threshold``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_server import StubLiveAgent, add_arguments, from_arguments  # noqa: E402
+
+# Tool name -> arguments for the n-th call; IDs are spread so the response cache
+# only helps where it would in real use (agents, departments)
+Workload = Callable[[random.Random, StubLiveAgent], Dict[str, Any]]
+
+WORKLOADS: Dict[str, Workload] = {
+    "list_tickets": lambda rnd, stub: {"limit": 20, "offset": rnd.randrange(0, stub.ticket_count, 20)},
+    "list_tickets_all": lambda rnd, stub: {"fetch_all": True, "max_items": 500, "format": "table"},
+    "get_ticket": lambda rnd, stub: {"ticket_id": f"t{rnd.randrange(stub.ticket_count):06d}"},
+    "get_tickets": lambda rnd, stub: {"ticket_ids": [f"t{rnd.randrange(stub.ticket_count):06d}" for _ in range(10)]},
+    "get_ticket_messages": lambda rnd, stub: {"ticket_id": f"t{rnd.randrange(stub.ticket_count):06d}"},
+    "search_tickets": lambda rnd, stub: {"query": rnd.choice(["login", "invoice", "widget", "export"])},
+    "update_ticket": lambda rnd, stub: {"ticket_id": f"t{rnd.randrange(stub.ticket_count):06d}", "status": "answered"},
+    "list_agents": lambda rnd, stub: {},
+    "get_agent": lambda rnd, stub: {"agent_id": rnd.choice(["ag001", "ag002", "ag003"])},
+    "list_contacts": lambda rnd, stub: {"limit": 20, "offset": rnd.randrange(0, stub.contact_count, 20)},
+    "get_contact": lambda rnd, stub: {"contact_id": f"c{rnd.randrange(stub.contact_count):06d}"},
+    "list_departments": lambda rnd, stub: {},
+    "list_chats": lambda rnd, stub: {},
+    "list_calls": lambda rnd, stub: {},
+}
+
+# Some workloads are variants of the same tool
+TOOL_NAMES = {"list_tickets_all": "list_tickets"}
+
+DEFAULT_WORKLOADS = [name for name in WORKLOADS if name != "update_ticket"]
+
+# Tools report failures as text rather than protocol errors
+ERROR_PREFIXES = ("LiveAgent API Error", "Unexpected error", "Invalid arguments", "Unknown tool", "Tool ")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    # Nearest-rank percentile of sorted samples
+    index = max(0, min(len(samples) - 1, int(round(q * len(samples) + 0.5)) - 1))
+    return samples[index]
+
+
+def server_env(base_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["LIVEAGENT_BASE_URL"] = base_url
+    env.setdefault("LIVEAGENT_V3_API_KEY", "benchmark")
+    # Measure the server, not the client-side rate limit, unless asked to
+    env.setdefault("LIVEAGENT_RATE_LIMIT", "0")
+    return env
+
+
+@asynccontextmanager
+async def open_session(transport: str, base_url: str):
+    if transport == "stdio":
+        params = StdioServerParameters(
+            command=sys.executable, args=["-m", "liveagent_mcp.server"], env=server_env(base_url)
+        )
+        with open(os.devnull, "w") as devnull:
+            async with stdio_client(params, errlog=devnull) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    yield session
+        return
+
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    os.environ.update(server_env(base_url))
+    from liveagent_mcp import server as liveagent_server
+    from liveagent_mcp.instance import get_instance
+    from liveagent_mcp.settings import get_settings
+
+    settings = get_settings()
+    liveagent_server.tools.configure(
+        concurrency=settings.tool_concurrency,
+        timeouts=settings.tool_timeouts,
+        default_timeout=settings.tool_timeout,
+    )
+    try:
+        async with create_connected_server_and_client_session(liveagent_server.server) as session:
+            yield session
+    finally:
+        await get_instance().close()
+
+
+async def run_workload(session: ClientSession, stub: StubLiveAgent, workload: str,
+                       concurrency: int, calls: int, seed: str) -> Dict[str, Any]:
+    tool = TOOL_NAMES.get(workload, workload)
+    make_arguments = WORKLOADS[workload]
+    # Fresh arguments per level, so a level doesn't hit entries cached by the previous one
+    rnd = random.Random(f"{seed}-{workload}-{concurrency}")
+    arguments = [make_arguments(rnd, stub) for _ in range(calls)]
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(arguments)
+
+    async def worker() -> None:
+        nonlocal errors
+        for args in remaining:
+            start = time.perf_counter()
+            result = await session.call_tool(tool, args)
+            latencies.append(time.perf_counter() - start)
+            text = result.content[0].text if result.content else ""
+            if result.isError or text.startswith(ERROR_PREFIXES):
+                errors += 1
+
+    upstream_before = sum(stub.requests.values())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    upstream = sum(stub.requests.values()) - upstream_before
+
+    latencies.sort()
+    return {
+        "workload": workload,
+        "concurrency": concurrency,
+        "calls": calls,
+        "errors": errors,
+        "rps": calls / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "upstream_per_call": upstream / calls,
+    }
+
+
+def print_report(results: List[Dict[str, Any]], regressions: Dict[Tuple[str, int], str]) -> None:
+    print(f"{'workload':<22}{'conc':>5}{'calls':>7}{'err':>5}{'req/s':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'upstream':>10}")
+    for r in results:
+        line = (f"{r['workload']:<22}{r['concurrency']:>5}{r['calls']:>7}{r['errors']:>5}{r['rps']:>10.1f}"
+                f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['upstream_per_call']:>10.2f}")
+        regression = regressions.get((r["workload"], r["concurrency"]))
+        print(line + (f"   REGRESSION: {regression}" if regression else ""))
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            threshold: float) -> Dict[Tuple[str, int], str]:
+    previous = {(r["workload"], r["concurrency"]): r for r in baseline}
+    regressions = {}
+    for r in results:
+        old = previous.get((r["workload"], r["concurrency"]))
+        if old is None:
+            continue
+        problems = []
+        if r["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            problems.append(f"p95 {old['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms")
+        if r["rps"] < old["rps"] * (1 - threshold):
+            problems.append(f"req/s {old['rps']:.1f} -> {r['rps']:.1f}")
+        if problems:
+            regressions[(r["workload"], r["concurrency"])] = ", ".join(problems)
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=["stdio", "memory"], default="stdio",
+                        help="how the client talks to the server (default: stdio)")
+    parser.add_argument("--workloads", default=",".join(DEFAULT_WORKLOADS),
+                        help=f"comma separated, from: {', '.join(WORKLOADS)} (default: all but update_ticket)")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels (default: 1,8,32)")
+    parser.add_argument("--calls", type=int, default=100, help="calls per workload and concurrency level (default: 100)")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured calls per workload first (default: 5)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for generated arguments (default: 1)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with results saved by --output")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change reported as a regression (default: 0.2)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    workloads = [w.strip() for w in args.workloads.split(",") if w.strip()]
+    unknown = [w for w in workloads if w not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown)}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    stub = from_arguments(args)
+    base_url = await stub.start()
+    results = []
+    try:
+        async with open_session(args.transport, base_url) as session:
+            for workload in workloads:
+                if args.warmup:
+                    await run_workload(session, stub, workload, 1, args.warmup, f"warmup-{args.seed}")
+                for level in levels:
+                    results.append(await run_workload(session, stub, workload, level, args.calls, str(args.seed)))
+    finally:
+        await stub.close()
+
+    regressions = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+
+    print(f"transport={args.transport} latency={args.latency}s jitter={args.jitter}s "
+          f"error_rate={args.error_rate} throttle_rate={args.throttle_rate}\n")
+    print_report(results, regressions)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,105 @@
+import datetime
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .formatting import CHANNEL_NAMES, TICKET_STATUS_NAMES
+
+DIMENSIONS = ("status", "department", "agent", "channel", "date")
+DATE_FIELDS = {"created": "date_created", "changed": "date_changed", "resolved": "date_resolved"}
+BUCKETS = ("day", "week", "month")
+
+
+class TicketAggregation:
+    """Ticket counts per status, department, agent, channel and date bucket.
+
+    Records are added page by page and only the counters are kept, so memory
+    depends on the number of distinct groups and not on the number of tickets.
+    With ``combine`` one rollup counts every combination of the dimensions
+    instead of one rollup per dimension.
+    """
+
+    def __init__(self, dimensions: Iterable[str] = DIMENSIONS, date_field: str = "created",
+                 bucket: str = "day", combine: bool = False):
+        self.dimensions = list(dimensions)
+        self.date_attribute = DATE_FIELDS[date_field]
+        self.bucket = bucket
+        self.combine = combine
+        self.total = 0
+        self.rollups: Dict[str, Counter] = {}
+        self._buckets: Dict[str, str] = {}
+        getters: Dict[str, Callable[[Any], Any]] = {
+            "status": lambda t: getattr(t, "status", None),
+            "department": lambda t: getattr(t, "departmentid", None),
+            "agent": lambda t: getattr(t, "agentid", None),
+            "channel": lambda t: getattr(t, "channel_type", None),
+            "date": self._date_bucket,
+        }
+        self._getters = [getters[dimension] for dimension in self.dimensions]
+
+    def _date_bucket(self, ticket: Any) -> Optional[str]:
+        value = getattr(ticket, self.date_attribute, None)
+        if not value:
+            return None
+        day = str(value)[:10]
+        # One entry per distinct day, so the bucket of a day is only worked out once
+        bucket = self._buckets.get(day)
+        if bucket is None:
+            if self.bucket == "day":
+                bucket = day
+            elif self.bucket == "month":
+                bucket = day[:7]
+            else:
+                try:
+                    year, week, _ = datetime.date.fromisoformat(day).isocalendar()
+                    bucket = f"{year}-W{week:02d}"
+                except ValueError:
+                    bucket = day
+            self._buckets[day] = bucket
+        return bucket
+
+    def add(self, tickets: Iterable[Any]) -> None:
+        getters = self._getters
+        if self.combine:
+            counter = self.rollups.setdefault(" x ".join(self.dimensions), Counter())
+            for ticket in tickets:
+                counter[tuple(get(ticket) for get in getters)] += 1
+                self.total += 1
+            return
+        counters = [self.rollups.setdefault(dimension, Counter()) for dimension in self.dimensions]
+        for ticket in tickets:
+            for get, counter in zip(getters, counters):
+                counter[get(ticket)] += 1
+            self.total += 1
+
+    def label(self, dimension: str, key: Any, directory: Any = None) -> str:
+        if key is None:
+            return "Unassigned" if dimension == "agent" else "None"
+        if dimension == "status":
+            return TICKET_STATUS_NAMES.get(key, key)
+        if dimension == "channel":
+            return CHANNEL_NAMES.get(key, key)
+        if directory is not None and dimension in ("agent", "department"):
+            record = directory.get_agent(key) if dimension == "agent" else directory.get_department(key)
+            if record is not None:
+                from .directory import agent_name
+
+                name = agent_name(record) if dimension == "agent" else getattr(record, "name", None)
+                if name:
+                    return f"{name} ({key})"
+        return str(key)
+
+    def rows(self, directory: Any = None, top: Optional[int] = None) -> List[Tuple[str, List[str], int]]:
+        """(rollup name, group labels, count) rows, largest groups first; dates in date order."""
+        rows = []
+        for name, counter in self.rollups.items():
+            if not self.combine and name == "date":
+                items = sorted(counter.items(), key=lambda item: (item[0] is None, item[0] or ""))
+            else:
+                items = counter.most_common()
+            if top is not None:
+                items = items[:top]
+            for key, count in items:
+                keys = key if self.combine else (key,)
+                dimensions = self.dimensions if self.combine else [name]
+                rows.append((name, [self.label(d, k, directory) for d, k in zip(dimensions, keys)], count))
+        return rows
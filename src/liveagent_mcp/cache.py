@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """In-process LRU cache for read-only API responses with a TTL per entity type.
+
+    Entries are keyed by ``(namespace, key)`` where the namespace is the entity
+    type (``ticket``, ``agent``, ...). A namespace with a TTL of 0 is never cached.
+    """
+
+    def __init__(self, max_size: int = 1024, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+
+    def ttl_for(self, namespace: str) -> float:
+        return self.ttls.get(namespace, self.default_ttl)
+
+    def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[(namespace, key)]
+            self.misses += 1
+            return default
+        self._entries.move_to_end((namespace, key))
+        self.hits += 1
+        return value
+
+    def set(self, namespace: str, key: Hashable, value: Any) -> None:
+        ttl = self.ttl_for(namespace)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[(namespace, key)] = (self._clock() + ttl, value)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, namespace: str, key: Hashable = _MISSING) -> None:
+        if key is not _MISSING:
+            self._entries.pop((namespace, key), None)
+            return
+        for entry_key in [k for k in self._entries if k[0] == namespace]:
+            del self._entries[entry_key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_fetch(self, namespace: str, key: Hashable,
+                           fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            value = await fetch()
+            self.set(namespace, key, value)
+        return value
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import sys
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .formatting import TICKET_STATUS_NAMES
+from .pagination import iter_changed_records
+
+CHANGES_URI = "liveagent://tickets/changes"
+
+# Fields compared between polls; a change to any of them is listed in the diff
+DIFF_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "subject": lambda t: getattr(t, "subject", None),
+    "status": lambda t: TICKET_STATUS_NAMES.get(getattr(t, "status", None), getattr(t, "status", None)),
+    "priority": lambda t: getattr(t, "priority", None),
+    "agent": lambda t: getattr(t, "agentid", None),
+    "department": lambda t: getattr(t, "departmentid", None),
+    "tags": lambda t: ", ".join(sorted(getattr(t, "tags", None) or [])) or None,
+}
+
+
+class TicketChange:
+    __slots__ = ("kind", "ticket", "diff")
+
+    def __init__(self, kind: str, ticket: Any, diff: Optional[Dict[str, Tuple[Any, Any]]]):
+        # kind is "created", "status_changed" or "updated"; diff is None when the
+        # previous values aren't known, i.e. the ticket wasn't seen by this feed before
+        self.kind = kind
+        self.ticket = ticket
+        self.diff = diff
+
+
+def _snapshot(ticket: Any) -> Tuple[Optional[str], Dict[str, Any]]:
+    return getattr(ticket, "date_changed", None), {name: get(ticket) for name, get in DIFF_FIELDS.items()}
+
+
+def format_diff(change: TicketChange) -> str:
+    if change.diff is None:
+        return "previous values unknown"
+    return "; ".join(f"{name}: {old} -> {new}" for name, (old, new) in change.diff.items()) or "activity only"
+
+
+def change_columns(selected: List[Tuple[str, str, Callable[[Any], Any]]]) -> List[Tuple[str, str, Callable[[Any], Any]]]:
+    # Ticket columns for rendering changes, after the kind of change and the diff
+    return [("change", "Change", lambda c: c.kind), ("diff", "Changed", format_diff)] + [
+        (name, label, lambda c, get=getter: get(c.ticket)) for name, label, getter in selected
+    ]
+
+
+class ChangeFeed:
+    """Tickets changed since the previous poll, with the fields that changed.
+
+    Each poll pages ``get_tickets_list`` for ``date_changed`` at or after the
+    watermark in ascending order (see :func:`iter_changed_records`), so its cost
+    follows the number of changed tickets rather than the size of the queue. The last seen values of up to
+    ``max_tracked`` tickets are kept to compute the diff and to drop tickets on
+    the watermark boundary that were already reported.
+    """
+
+    def __init__(self, tickets_api: Any, department_id: Optional[str] = None,
+                 page_size: int = 100, max_tracked: int = 10000):
+        self.tickets_api = tickets_api
+        self.department_id = department_id
+        self.page_size = page_size
+        self.max_tracked = max_tracked
+        self.watermark: Optional[str] = None
+        self._seen: "OrderedDict[str, Tuple[Optional[str], Dict[str, Any]]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def _filters(self, since: Optional[str]) -> Optional[str]:
+        filters = []
+        if since:
+            filters.append(["date_changed", ">=", since])
+        if self.department_id:
+            filters.append(["departmentid", "=", self.department_id])
+        return json.dumps(filters) if filters else None
+
+    def _remember(self, ticket: Any, snapshot: Tuple[Optional[str], Dict[str, Any]]) -> None:
+        self._seen[ticket.id] = snapshot
+        self._seen.move_to_end(ticket.id)
+        while len(self._seen) > self.max_tracked:
+            self._seen.popitem(last=False)
+
+    async def start(self) -> None:
+        # Without an explicit start the feed begins at the most recently changed ticket
+        tickets = await self.tickets_api.get_tickets_list(
+            filters=self._filters(None), sort_field="date_changed", sort_dir="DESC", per_page=1, page=1,
+        ) or []
+        for ticket in tickets:
+            self._remember(ticket, _snapshot(ticket))
+            self.watermark = getattr(ticket, "date_changed", None)
+        if self.watermark is None:
+            self.watermark = ""
+
+    async def ensure_started(self) -> None:
+        async with self._lock:
+            if self.watermark is None:
+                await self.start()
+
+    async def poll(self, max_items: int, since: Optional[str] = None) -> Tuple[List[TicketChange], bool]:
+        """Changes since the watermark (or ``since``), oldest first, and whether more are left."""
+        async with self._lock:
+            if since is not None:
+                self.watermark = since
+            elif self.watermark is None:
+                await self.start()
+                return [], False
+
+            previous = self.watermark
+
+            def fetch_page(since: Optional[str], page: int) -> Any:
+                return self.tickets_api.get_tickets_list(
+                    filters=self._filters(since), sort_field="date_changed", sort_dir="ASC",
+                    per_page=self.page_size, page=page,
+                )
+
+            changes: List[TicketChange] = []
+            async for tickets in iter_changed_records(fetch_page, self.page_size, previous or None):
+                for ticket in tickets:
+                    snapshot = _snapshot(ticket)
+                    seen = self._seen.get(ticket.id)
+                    if seen is not None and seen[0] == snapshot[0]:
+                        # Already reported, it's on the watermark boundary
+                        continue
+                    if seen is None:
+                        created = bool(previous) and (getattr(ticket, "date_created", None) or "") >= previous
+                        changes.append(TicketChange("created" if created else "updated", ticket, None))
+                    else:
+                        diff = {name: (seen[1][name], value) for name, value in snapshot[1].items()
+                                if seen[1][name] != value}
+                        changes.append(TicketChange("status_changed" if "status" in diff else "updated", ticket, diff))
+                    self._remember(ticket, snapshot)
+                    if snapshot[0] and snapshot[0] > self.watermark:
+                        self.watermark = snapshot[0]
+                    if len(changes) >= max_items:
+                        # The rest is picked up by the next poll from the new watermark
+                        return changes, True
+            return changes, False
+
+
+class ChangeFeeds:
+    """One :class:`ChangeFeed` per client session and department filter.
+
+    Feeds go away with their session. Calls made outside of a session share
+    the feeds stored under ``None``.
+    """
+
+    def __init__(self, tickets_api: Any, page_size: int = 100, max_tracked: int = 10000):
+        self.tickets_api = tickets_api
+        self.page_size = page_size
+        self.max_tracked = max_tracked
+        self._by_session: "weakref.WeakKeyDictionary[Any, Dict[Optional[str], ChangeFeed]]" = weakref.WeakKeyDictionary()
+        self._detached: Dict[Optional[str], ChangeFeed] = {}
+
+    def get(self, session: Any, department_id: Optional[str] = None) -> ChangeFeed:
+        feeds = self._detached if session is None else self._by_session.setdefault(session, {})
+        feed = feeds.get(department_id)
+        if feed is None:
+            feed = feeds[department_id] = ChangeFeed(
+                self.tickets_api, department_id, page_size=self.page_size, max_tracked=self.max_tracked
+            )
+        return feed
+
+
+class ChangeNotifier:
+    """Tells subscribed sessions when tickets have changed.
+
+    One request per interval fetches the most recently changed ticket, however
+    many sessions are subscribed, and only while at least one is. When its
+    ``date_changed`` moves, every subscriber gets a resource updated notification
+    and reads its own delta from its feed.
+    """
+
+    def __init__(self, tickets_api: Any, uri: str = CHANGES_URI):
+        self.tickets_api = tickets_api
+        self.uri = uri
+        self.subscribers: "weakref.WeakSet" = weakref.WeakSet()
+        self.latest: Optional[str] = None
+
+    async def check(self) -> bool:
+        tickets = await self.tickets_api.get_tickets_list(
+            sort_field="date_changed", sort_dir="DESC", per_page=1, page=1,
+        ) or []
+        latest = getattr(tickets[0], "date_changed", None) if tickets else None
+        changed = self.latest is not None and latest != self.latest
+        self.latest = latest
+        return changed
+
+    async def notify(self) -> None:
+        for session in list(self.subscribers):
+            try:
+                await session.send_resource_updated(self.uri)
+            except Exception:
+                # The session is gone
+                self.subscribers.discard(session)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            if self.subscribers:
+                try:
+                    if await self.check():
+                        await self.notify()
+                except Exception as e:
+                    print(f"Ticket change check failed: {e}", file=sys.stderr)
+            else:
+                # Nothing to compare with once somebody subscribes again
+                self.latest = None
+            await asyncio.sleep(interval)
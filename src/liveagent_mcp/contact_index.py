@@ -0,0 +1,191 @@
+import asyncio
+import bisect
+import json
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .pagination import iter_changed_records
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Score of a query term matching a whole token, the start of one, or its inside
+_EXACT, _PREFIX, _INFIX = 3, 2, 1
+
+
+def contact_emails(contact: Any) -> List[str]:
+    emails = list(getattr(contact, "emails", None) or [])
+    email = getattr(contact, "email", None)
+    if email and email not in emails:
+        emails.append(email)
+    return [e.lower() for e in emails if e]
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class ContactIndex:
+    """In-memory contact index for email lookups and name/company search.
+
+    Emails are kept in an exact map. First name, last name, company and email
+    words are tokenized into a sorted token list for prefix matches, plus a
+    trigram map from which infix matches ("son" in "johnson") are found. All of
+    it is synced incrementally from ``get_contacts_list`` by ``date_changed``
+    (see :func:`iter_changed_records`). The sync doesn't see deleted contacts;
+    they stay in the index until restart.
+    """
+
+    def __init__(self, contacts_api: Any, page_size: int = 100, max_staleness: float = 600.0):
+        self.contacts_api = contacts_api
+        self.page_size = page_size
+        self.max_staleness = max_staleness
+        self.last_sync: Optional[float] = None
+        self.watermark: Optional[str] = None
+        self._contacts: Dict[str, Any] = {}
+        self._tokens_by_id: Dict[str, Set[str]] = {}
+        self._ids_by_token: Dict[str, Set[str]] = {}
+        self._tokens_by_trigram: Dict[str, Set[str]] = {}
+        self._ids_by_email: Dict[str, Set[str]] = {}
+        self._emails_by_id: Dict[str, List[str]] = {}
+        self._sorted_tokens: Optional[List[str]] = None
+        self._sync_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._contacts)
+
+    def is_fresh(self) -> bool:
+        return self.last_sync is not None and time.time() - self.last_sync <= self.max_staleness
+
+    # Maintenance
+
+    def _remove(self, contact_id: str) -> None:
+        for token in self._tokens_by_id.pop(contact_id, ()):
+            ids = self._ids_by_token[token]
+            ids.discard(contact_id)
+            if not ids:
+                del self._ids_by_token[token]
+                self._sorted_tokens = None
+                for gram in _trigrams(token):
+                    tokens = self._tokens_by_trigram[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._tokens_by_trigram[gram]
+        for email in self._emails_by_id.pop(contact_id, ()):
+            ids = self._ids_by_email[email]
+            ids.discard(contact_id)
+            if not ids:
+                del self._ids_by_email[email]
+        self._contacts.pop(contact_id, None)
+
+    def upsert(self, contacts: Iterable[Any]) -> None:
+        for contact in contacts:
+            contact_id = getattr(contact, "id", None)
+            if contact_id is None:
+                continue
+            self._remove(contact_id)
+            emails = contact_emails(contact)
+            tokens = set()
+            for text in (getattr(contact, "firstname", None), getattr(contact, "lastname", None),
+                         getattr(contact, "company_name", None), *emails):
+                tokens.update(_tokens(text))
+
+            self._contacts[contact_id] = contact
+            self._emails_by_id[contact_id] = emails
+            for email in emails:
+                self._ids_by_email.setdefault(email, set()).add(contact_id)
+            self._tokens_by_id[contact_id] = tokens
+            for token in tokens:
+                ids = self._ids_by_token.get(token)
+                if ids is None:
+                    ids = self._ids_by_token[token] = set()
+                    self._sorted_tokens = None
+                    for gram in _trigrams(token):
+                        self._tokens_by_trigram.setdefault(gram, set()).add(token)
+                ids.add(contact_id)
+
+    async def sync(self) -> int:
+        """Fetch contacts changed since the watermark; returns the number of contacts stored."""
+        async with self._sync_lock:
+            def fetch_page(since: Optional[str], page: int) -> Any:
+                return self.contacts_api.get_contacts_list(
+                    filters=json.dumps([["date_changed", ">=", since]]) if since else None,
+                    sort_field="date_changed", sort_dir="ASC", per_page=self.page_size, page=page,
+                )
+
+            stored = 0
+            async for contacts in iter_changed_records(fetch_page, self.page_size, self.watermark):
+                self.upsert(contacts)
+                changed = [c.date_changed for c in contacts if getattr(c, "date_changed", None)]
+                if changed:
+                    self.watermark = max([self.watermark or ""] + changed)
+                stored += len(contacts)
+            self.last_sync = time.time()
+            return stored
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Contact index sync failed: {e}", file=sys.stderr)
+            await asyncio.sleep(interval)
+
+    # Lookups
+
+    def find_by_email(self, email: str) -> List[Any]:
+        return [self._contacts[i] for i in sorted(self._ids_by_email.get(email.strip().lower(), ()))]
+
+    def _term_matches(self, term: str) -> Dict[str, int]:
+        # Contact ID -> best score of this term against the contact's tokens
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._ids_by_token)
+        scores: Dict[str, int] = {}
+
+        def add(token: str, score: int) -> None:
+            for contact_id in self._ids_by_token[token]:
+                if scores.get(contact_id, 0) < score:
+                    scores[contact_id] = score
+
+        start = bisect.bisect_left(self._sorted_tokens, term)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(term):
+                break
+            add(token, _EXACT if token == term else _PREFIX)
+        if len(term) >= 3:
+            grams = sorted(_trigrams(term), key=lambda g: len(self._tokens_by_trigram.get(g, ())))
+            candidates = set(self._tokens_by_trigram.get(grams[0], ()))
+            for gram in grams[1:]:
+                candidates &= self._tokens_by_trigram.get(gram, set())
+            for token in candidates:
+                if not token.startswith(term) and term in token:
+                    add(token, _INFIX)
+        return scores
+
+    def search(self, query: Optional[str] = None, email: Optional[str] = None) -> List[Any]:
+        """Contacts matching every word of ``query`` (and ``email`` exactly, if given), best first."""
+        candidates: Optional[Dict[str, int]] = None
+        if email:
+            candidates = {i: 0 for i in self._ids_by_email.get(email.strip().lower(), ())}
+        for term in _tokens(query):
+            matches = self._term_matches(term)
+            if candidates is None:
+                candidates = matches
+            else:
+                candidates = {i: score + matches[i] for i, score in candidates.items() if i in matches}
+            if not candidates:
+                return []
+        if not candidates:
+            return []
+
+        def sort_key(contact_id: str):
+            contact = self._contacts[contact_id]
+            name = f"{getattr(contact, 'firstname', None) or ''} {getattr(contact, 'lastname', None) or ''}"
+            return -candidates[contact_id], name.lower(), contact_id
+
+        return [self._contacts[i] for i in sorted(candidates, key=sort_key)]
@@ -0,0 +1,89 @@
+import secrets
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+from .errors import ToolInputError
+
+
+class StoredResult:
+    __slots__ = ("items", "fmt", "selected", "noun", "page_size", "size", "expires_at")
+
+    def __init__(self, items: List[str], fmt: str, selected: List[Tuple[str, str, Callable[[Any], Any]]],
+                 noun: str, page_size: int):
+        # items are the records rendered one by one, see formatting.render_items
+        self.items = items
+        self.fmt = fmt
+        self.selected = selected
+        self.noun = noun
+        self.page_size = page_size
+        self.size = sys.getsizeof(items) + sum(sys.getsizeof(item) for item in items)
+        self.expires_at = 0.0
+
+
+def make_cursor(result_id: str, offset: int) -> str:
+    return f"{result_id}.{offset}"
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int]:
+    result_id, _, offset = cursor.rpartition(".")
+    if not result_id or not offset.isdigit():
+        raise ToolInputError(f"Invalid cursor: {cursor}")
+    return result_id, int(offset)
+
+
+class ResultStore:
+    """Large tool results kept in memory so the rest can be read page by page.
+
+    A result is rendered once and stored under a random ID; a cursor is that ID
+    plus the offset of the next page, so reading a page again with the same
+    cursor returns the same records. Results expire ``ttl`` seconds after they
+    were last read. The rendered text of all results together is kept under
+    ``max_bytes`` by dropping the least recently read ones; a result larger than
+    that on its own is not stored.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 900.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._results: "OrderedDict[str, StoredResult]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def _drop(self, result_id: str) -> None:
+        self.size -= self._results.pop(result_id).size
+
+    def put(self, result: StoredResult) -> Optional[str]:
+        """Store ``result`` and return its ID, or None if it doesn't fit the budget."""
+        if self.ttl <= 0 or result.size > self.max_bytes:
+            return None
+        now = self._clock()
+        for result_id in [k for k, v in self._results.items() if v.expires_at <= now]:
+            self._drop(result_id)
+        while self._results and self.size + result.size > self.max_bytes:
+            self._drop(next(iter(self._results)))
+        result_id = secrets.token_urlsafe(12)
+        result.expires_at = now + self.ttl
+        self._results[result_id] = result
+        self.size += result.size
+        return result_id
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        result = self._results.get(result_id)
+        now = self._clock()
+        if result is None or result.expires_at <= now:
+            if result is not None:
+                self._drop(result_id)
+            self.misses += 1
+            return None
+        result.expires_at = now + self.ttl
+        self._results.move_to_end(result_id)
+        self.hits += 1
+        return result
@@ -0,0 +1,47 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Coroutine, Iterator, Optional
+
+from .metrics import detach_tool_call
+
+# Monotonic time by which the current tool call must finish; tasks spawned by the
+# handler copy the context and share it
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("liveagent_deadline", default=None)
+
+
+@contextmanager
+def deadline_after(timeout: Optional[float]) -> Iterator[None]:
+    """Set a deadline ``timeout`` seconds from now, unless an earlier one is already set."""
+    if not timeout:
+        yield
+        return
+    deadline = time.monotonic() + timeout
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def spawn(coro: Coroutine[Any, Any, Any], background: bool = False) -> asyncio.Task:
+    """Start ``coro`` as a task that isn't bound by the deadline of the current tool call.
+
+    For work that must finish even when the call gives up, like a write the API
+    may already have applied. ``background`` tasks, like polls that outlive the
+    call, aren't counted in its metrics either.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    if background:
+        context.run(detach_tool_call)
+    # A task copies the context it is created in
+    return context.run(asyncio.ensure_future, coro)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline, None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
@@ -0,0 +1,88 @@
+import asyncio
+import copy
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .pagination import iter_unique_records
+
+
+def agent_name(agent: Any) -> Optional[str]:
+    name = f"{getattr(agent, 'firstname', None) or ''} {getattr(agent, 'lastname', None) or ''}".strip()
+    return name or getattr(agent, "email", None)
+
+
+class Directory:
+    """In-memory copy of agents and departments, refreshed in the background.
+
+    Ticket records only carry ``agentid`` and ``departmentid``; :meth:`annotate`
+    returns copies with ``agent_name`` and ``department_name`` from the directory
+    added with dict lookups, so listings are readable without a lookup per ticket. Until the
+    first refresh succeeds the directory is empty and callers use the API.
+    """
+
+    def __init__(self, agents_api: Any, departments_api: Any, page_size: int = 100, page_concurrency: int = 4):
+        self.agents_api = agents_api
+        self.departments_api = departments_api
+        self.page_size = page_size
+        self.page_concurrency = page_concurrency
+        self.agents: List[Any] = []
+        self.departments: List[Any] = []
+        self.last_refresh: Optional[float] = None
+        self._agents_by_id: Dict[str, Any] = {}
+        self._departments_by_id: Dict[str, Any] = {}
+        self._agent_names: Dict[str, str] = {}
+        self._department_names: Dict[str, str] = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.last_refresh is not None
+
+    async def refresh(self) -> None:
+        agents = []
+        async for page in iter_unique_records(
+            lambda page: self.agents_api.get_agents(per_page=self.page_size, page=page),
+            self.page_size, concurrency=self.page_concurrency,
+        ):
+            agents.extend(page)
+        departments = await self.departments_api.get_department_list() or []
+
+        # Swapped in one step so readers never see a half-built directory
+        self._agents_by_id = {agent.id: agent for agent in agents}
+        self._departments_by_id = {department.id: department for department in departments}
+        self._agent_names = {agent.id: agent_name(agent) for agent in agents}
+        self._department_names = {
+            department.id: getattr(department, "name", None) or department.id for department in departments
+        }
+        self.agents = agents
+        self.departments = departments
+        self.last_refresh = time.time()
+
+    def get_agent(self, agent_id: str) -> Optional[Any]:
+        return self._agents_by_id.get(agent_id)
+
+    def get_department(self, department_id: str) -> Optional[Any]:
+        return self._departments_by_id.get(department_id)
+
+    def annotate(self, tickets: Iterable[Any]) -> List[Any]:
+        # Also used for chats and calls, which may name the fields agent_id and department_id.
+        # The records may be shared with caches and other tenants, so names go on copies
+        agent_names = self._agent_names
+        department_names = self._department_names
+        annotated = []
+        for ticket in tickets:
+            ticket = copy.copy(ticket)
+            ticket.agent_name = agent_names.get(getattr(ticket, "agentid", None) or getattr(ticket, "agent_id", None))
+            ticket.department_name = department_names.get(
+                getattr(ticket, "departmentid", None) or getattr(ticket, "department_id", None)
+            )
+            annotated.append(ticket)
+        return annotated
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Directory refresh failed: {e}", file=sys.stderr)
+            await asyncio.sleep(interval)
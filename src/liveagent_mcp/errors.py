@@ -0,0 +1,28 @@
+from typing import Dict, Optional
+
+
+class ApiException(Exception):
+    """Error raised by the async transport, mirroring ``liveagent_api.rest.ApiException``."""
+
+    def __init__(self, status: Optional[int] = None, reason: Optional[str] = None,
+                 body: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.reason = reason
+        self.body = body
+        self.headers = headers
+
+    def __str__(self) -> str:
+        error_message = f"({self.status})\nReason: {self.reason}\n"
+        if self.headers:
+            error_message += f"HTTP response headers: {self.headers}\n"
+        if self.body:
+            error_message += f"HTTP response body: {self.body}\n"
+        return error_message
+
+
+class ToolInputError(ValueError):
+    """Raised for tool arguments that are rejected before any API call is made."""
+
+
+class ToolTimeoutError(Exception):
+    """Raised when a tool call exceeds its configured timeout."""
@@ -0,0 +1,207 @@
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .errors import ToolInputError
+
+# Lookup tables are built once at import instead of on every formatted record
+TICKET_STATUS_NAMES = {
+    'I': 'Init', 'N': 'New', 'T': 'Chatting', 'P': 'Calling',
+    'R': 'Resolved', 'X': 'Deleted', 'B': 'Spam', 'A': 'Answered',
+    'C': 'Open', 'W': 'Postponed', 'L': 'Closed'
+}
+TICKET_STATUS_CODES = {
+    'init': 'I', 'new': 'N', 'chatting': 'T', 'calling': 'P',
+    'resolved': 'R', 'deleted': 'X', 'spam': 'B', 'answered': 'A',
+    'open': 'C', 'postponed': 'W', 'closed': 'L'
+}
+CHANNEL_NAMES = {
+    'E': 'Email', 'B': 'Contact Button', 'M': 'Contact Form',
+    'I': 'Invitation', 'C': 'Call', 'W': 'Call Button',
+    'F': 'Facebook', 'A': 'Facebook Message', 'T': 'Twitter',
+    'Q': 'Forum', 'S': 'Suggestion'
+}
+CALL_STATUS_NAMES = {
+    'O': 'Callee Offline', 'Q': 'Waiting in Queue', 'R': 'Ringing to an Agent',
+    'C': 'Calling with an Agent', 'F': 'Finished'
+}
+
+OUTPUT_FORMATS = ("text", "json", "table")
+
+def _named(name: Optional[str], record_id: Optional[str]) -> Optional[str]:
+    # "Support (dep01)" once the directory has annotated the record, else the bare ID
+    return f"{name} ({record_id})" if name and record_id else record_id
+
+
+def _first(record: Any, *names: str) -> Any:
+    # Chats and calls are plain API objects, so fields are looked up by the names the API may use
+    for name in names:
+        value = getattr(record, name, None)
+        if value is not None:
+            return value
+    return None
+
+
+# Field name -> (text label, getter); dict order is the output order
+FieldSpec = Dict[str, Tuple[str, Callable[[Any], Any]]]
+
+TICKET_FIELDS: FieldSpec = {
+    "id": ("Ticket ID", lambda t: t.id),
+    "code": ("Code", lambda t: t.code),
+    "subject": ("Subject", lambda t: t.subject),
+    "status": ("Status", lambda t: TICKET_STATUS_NAMES.get(t.status, t.status)),
+    "channel": ("Channel", lambda t: CHANNEL_NAMES.get(t.channel_type, t.channel_type)),
+    "department": ("Department", lambda t: _named(getattr(t, 'department_name', None), t.departmentid)),
+    "agent": ("Agent", lambda t: _named(getattr(t, 'agent_name', None), t.agentid) or 'Unassigned'),
+    "customer": ("Customer", lambda t: f"{t.owner_name} ({t.owner_email})"),
+    "created": ("Created", lambda t: t.date_created),
+    "updated": ("Last Updated", lambda t: getattr(t, 'date_changed', None) or 'N/A'),
+}
+
+AGENT_FIELDS: FieldSpec = {
+    "id": ("Agent ID", lambda a: a.id),
+    "name": ("Name", lambda a: f"{a.firstname} {a.lastname}"),
+    "email": ("Email", lambda a: a.email),
+    "status": ("Status", lambda a: 'Online' if getattr(a, 'is_online', False) else 'Offline'),
+    "role": ("Role", lambda a: getattr(a, 'role', None) or 'Agent'),
+}
+
+CONTACT_FIELDS: FieldSpec = {
+    "id": ("Contact ID", lambda c: c.id),
+    "name": ("Name", lambda c: f"{getattr(c, 'firstname', None) or ''} {getattr(c, 'lastname', None) or ''}"),
+    "email": ("Email", lambda c: c.email),
+    "phone": ("Phone", lambda c: getattr(c, 'phone', None) or 'N/A'),
+    "company": ("Company", lambda c: getattr(c, 'company_name', None) or 'N/A'),
+}
+
+DEPARTMENT_FIELDS: FieldSpec = {
+    "id": ("ID", lambda d: getattr(d, 'id', None) or 'N/A'),
+    "name": ("Name", lambda d: getattr(d, 'name', None) or 'N/A'),
+    "description": ("Description", lambda d: getattr(d, 'description', None) or 'N/A'),
+}
+
+
+COMPANY_FIELDS: FieldSpec = {
+    "id": ("Company ID", lambda c: getattr(c, 'id', None)),
+    "name": ("Name", lambda c: _first(c, 'name', 'company_name')),
+    "email": ("Email", lambda c: _first(c, 'email') or ", ".join(getattr(c, 'emails', None) or []) or None),
+    "phone": ("Phone", lambda c: _first(c, 'phone') or ", ".join(getattr(c, 'phones', None) or []) or None),
+    "city": ("City", lambda c: _first(c, 'city')),
+    "country": ("Country", lambda c: _first(c, 'countrycode', 'country')),
+}
+
+CHAT_FIELDS: FieldSpec = {
+    "id": ("Chat ID", lambda c: getattr(c, 'id', None)),
+    "status": ("Status", lambda c: _first(c, 'status')),
+    "ticket": ("Ticket", lambda c: _first(c, 'ticket_id', 'conversationid', 'ticket_code')),
+    "department": ("Department", lambda c: _named(getattr(c, 'department_name', None), _first(c, 'departmentid', 'department_id'))),
+    "agent": ("Agent", lambda c: _named(getattr(c, 'agent_name', None), _first(c, 'agentid', 'agent_id')) or 'Unassigned'),
+    "visitor": ("Visitor", lambda c: _first(c, 'contact_name', 'visitor_name', 'owner_name', 'contactid', 'contact_id')),
+    "started": ("Started", lambda c: _first(c, 'date_created', 'date_started')),
+}
+
+CALL_FIELDS: FieldSpec = {
+    "id": ("Call ID", lambda c: getattr(c, 'id', None)),
+    "status": ("Status", lambda c: CALL_STATUS_NAMES.get(_first(c, 'status'), _first(c, 'status'))),
+    "direction": ("Direction", lambda c: _first(c, 'direction')),
+    "ticket": ("Ticket", lambda c: _first(c, 'ticket_id', 'conversationid')),
+    "department": ("Department", lambda c: _named(getattr(c, 'department_name', None), _first(c, 'departmentid', 'department_id'))),
+    "agent": ("Agent", lambda c: _named(getattr(c, 'agent_name', None), _first(c, 'agentid', 'agent_id')) or 'Unassigned'),
+    "caller": ("Caller", lambda c: _first(c, 'source_number', 'caller_number', 'contact_name', 'contactid')),
+    "started": ("Started", lambda c: _first(c, 'date_created', 'date_started')),
+}
+
+
+def output_schema(spec: FieldSpec) -> Dict[str, Any]:
+    """JSON schema properties for the ``format`` and ``fields`` tool arguments."""
+    return {
+        "format": {
+            "type": "string",
+            "description": "Output format: text (default), json or table (one row per record, most compact)",
+            "enum": list(OUTPUT_FORMATS),
+            "default": "text"
+        },
+        "fields": {
+            "type": "array",
+            "description": f"Only return these fields (default: all): {', '.join(spec)}",
+            "items": {"type": "string", "enum": list(spec)}
+        },
+    }
+
+
+def select_fields(spec: FieldSpec, fields: Optional[Iterable[str]] = None) -> List[Tuple[str, str, Callable[[Any], Any]]]:
+    if not fields:
+        return [(name, label, getter) for name, (label, getter) in spec.items()]
+    unknown = [name for name in fields if name not in spec]
+    if unknown:
+        raise ToolInputError(f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(spec)}")
+    return [(name, spec[name][0], spec[name][1]) for name in fields]
+
+
+def output_options(params: dict, spec: FieldSpec) -> Tuple[str, List[Tuple[str, str, Callable[[Any], Any]]]]:
+    fmt = params.get("format") or "text"
+    if fmt not in OUTPUT_FORMATS:
+        raise ToolInputError(f"Unknown format: {fmt}. Available formats: {', '.join(OUTPUT_FORMATS)}")
+    return fmt, select_fields(spec, params.get("fields"))
+
+
+def _cell(value: Any) -> str:
+    return "" if value is None else str(value).replace("|", "/").replace("\n", " ")
+
+
+def render(records: Iterable[Any], fmt: str, selected: List[Tuple[str, str, Callable[[Any], Any]]],
+           separator: str = "-" * 30, header: bool = True) -> str:
+    """Render records in one pass as text blocks, a JSON array or a pipe-separated table."""
+    if fmt == "json":
+        return json.dumps(
+            [{name: getter(record) for name, _, getter in selected} for record in records],
+            separators=(",", ":"), default=str,
+        )
+    if fmt == "table":
+        lines = [" | ".join(name for name, _, _ in selected)] if header else []
+        lines.extend(" | ".join(_cell(getter(record)) for _, _, getter in selected) for record in records)
+        return "\n".join(lines)
+    return "".join(
+        "\n".join(f"{label}: {getter(record)}" for _, label, getter in selected) + "\n" + separator + "\n"
+        for record in records
+    )
+
+
+def render_items(records: Iterable[Any], fmt: str, selected: List[Tuple[str, str, Callable[[Any], Any]]],
+                 separator: str = "-" * 30) -> List[str]:
+    """Render every record on its own, so any slice can be joined with :func:`join_items`."""
+    if fmt == "json":
+        return [render_one(record, fmt, selected) for record in records]
+    return [render([record], fmt, selected, separator, header=False) for record in records]
+
+
+def join_items(items: List[str], fmt: str, selected: List[Tuple[str, str, Callable[[Any], Any]]]) -> str:
+    if fmt == "json":
+        return "[" + ",".join(items) + "]"
+    if fmt == "table":
+        return "\n".join([" | ".join(name for name, _, _ in selected)] + items)
+    return "".join(items)
+
+
+def render_one(record: Any, fmt: str, selected: List[Tuple[str, str, Callable[[Any], Any]]]) -> str:
+    if fmt == "json":
+        return json.dumps({name: getter(record) for name, _, getter in selected}, separators=(",", ":"), default=str)
+    if fmt == "table":
+        return render([record], fmt, selected)
+    return "\n".join(f"{label}: {getter(record)}" for _, label, getter in selected)
+
+
+_ALL_TICKET_FIELDS = select_fields(TICKET_FIELDS)
+_ALL_AGENT_FIELDS = select_fields(AGENT_FIELDS)
+_ALL_CONTACT_FIELDS = select_fields(CONTACT_FIELDS)
+
+
+def format_ticket(ticket: Any) -> str:
+    return render_one(ticket, "text", _ALL_TICKET_FIELDS)
+
+
+def format_agent(agent: Any) -> str:
+    return render_one(agent, "text", _ALL_AGENT_FIELDS)
+
+
+def format_contact(contact: Any) -> str:
+    return render_one(contact, "text", _ALL_CONTACT_FIELDS)
@@ -0,0 +1,90 @@
+import contextlib
+import os
+import sys
+from typing import Any, AsyncIterator, Optional
+
+from .metrics import metrics
+from .server import running_services, server
+from .settings import Settings, get_settings
+
+
+class _McpEndpoint:
+    # An ASGI app rather than a function, so Starlette passes the raw scope through
+    def __init__(self, session_manager: Any):
+        self.session_manager = session_manager
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.session_manager.handle_request(scope, receive, send)
+
+
+def create_app(settings: Optional[Settings] = None) -> Any:
+    """ASGI app serving MCP over streamable HTTP at ``settings.http_path``.
+
+    All sessions of the process share one LiveAgent instance per tenant, so the
+    connection pool, rate limiter and caches of an account are shared too. A
+    session picks its tenant with the ``X-LiveAgent-Tenant`` header. ``/metrics`` and ``/healthz``
+    are served next to the MCP endpoint.
+    """
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    settings = settings or get_settings()
+    settings.validate()
+
+    # Sessions live in the memory of one worker, so with several workers behind
+    # one port each request must stand on its own
+    settings.transport = "http"
+    stateless = settings.stateless
+    session_manager = StreamableHTTPSessionManager(app=server, stateless=stateless)
+
+    async def metrics_endpoint(request) -> PlainTextResponse:
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    async def health_endpoint(request) -> PlainTextResponse:
+        return PlainTextResponse("ok\n")
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app) -> AsyncIterator[None]:
+        # The metrics port isn't opened here since several workers would compete for it
+        async with running_services(settings, metrics_endpoint=False):
+            async with session_manager.run():
+                print(f"LiveAgent MCP Server (pid {os.getpid()}) serving {settings.http_path}"
+                      f"{' (stateless)' if stateless else ''}", file=sys.stderr)
+                yield
+        print(f"LiveAgent MCP Server (pid {os.getpid()}) stopped", file=sys.stderr)
+
+    return Starlette(
+        routes=[
+            Route(settings.http_path, endpoint=_McpEndpoint(session_manager)),
+            Route("/metrics", endpoint=metrics_endpoint),
+            Route("/healthz", endpoint=health_endpoint),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def run_http(settings: Settings) -> None:
+    import uvicorn
+
+    settings.validate()
+    print(f"LiveAgent MCP Server starting on http://{settings.http_host}:{settings.http_port}{settings.http_path} "
+          f"with {settings.http_workers} worker(s)", file=sys.stderr)
+    if settings.tenants_file:
+        print(f"Tenants file: {settings.tenants_file}", file=sys.stderr)
+    else:
+        print(f"Base URL: {settings.base_url}", file=sys.stderr)
+
+    options = dict(
+        host=settings.http_host,
+        port=settings.http_port,
+        timeout_graceful_shutdown=settings.http_shutdown_timeout,
+        log_level="warning",
+    )
+    if settings.http_workers > 1:
+        # Workers are separate processes that build the app from the environment
+        os.environ["LIVEAGENT_HTTP_WORKERS"] = str(settings.http_workers)
+        uvicorn.run("liveagent_mcp.http_server:create_app", factory=True, workers=settings.http_workers, **options)
+    else:
+        uvicorn.run(create_app(settings), **options)
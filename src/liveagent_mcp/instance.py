@@ -0,0 +1,352 @@
+import asyncio
+import contextvars
+import sys
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cache import ResponseCache
+from .deadline import spawn
+from .errors import ToolInputError
+from .metrics import CACHE_ENTRIES, CACHE_LOOKUPS, metrics
+from .settings import Settings, get_settings, load_tenants
+
+
+class LiveAgentInstance:
+    """Connection pool, rate limiter, caches and API objects for one LiveAgent account.
+
+    Nothing is built until it is first used, so importing and starting the server
+    doesn't pay for importing the generated SDK or opening connections.
+    """
+
+    def __init__(self, settings: Settings, name: str = "default"):
+        self.settings = settings
+        self.name = name
+        self._tasks: List[asyncio.Task] = []
+
+    @cached_property
+    def api_client(self) -> Any:
+        import liveagent_api
+
+        from .ratelimit import HedgePolicy, RateLimiter, RetryBudget, RetryPolicy
+        from .transport import AsyncApiClient
+
+        settings = self.settings
+        configuration = liveagent_api.Configuration()
+        configuration.host = f"{settings.base_url}/api/v3"
+        configuration.api_key["apikey"] = settings.api_key
+        configuration.request_timeout = settings.timeout
+
+        # One limiter and retry budget shared by every API object of this instance
+        rate_limiter = None
+        if settings.rate_limit > 0:
+            rate_limiter = RateLimiter(settings.rate_limit, burst=settings.rate_limit_burst)
+        retry_policy = RetryPolicy(
+            max_retries=settings.max_retries,
+            budget=RetryBudget(ratio=settings.retry_budget_ratio),
+        )
+        hedge_policy = None
+        if settings.hedge_operations:
+            hedge_policy = HedgePolicy(
+                settings.hedge_operations,
+                quantile=settings.hedge_quantile,
+                min_delay=settings.hedge_min_delay,
+                budget=RetryBudget(ratio=settings.hedge_budget_ratio),
+            )
+
+        return AsyncApiClient(
+            configuration,
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            hedge_policy=hedge_policy,
+            raw_records=settings.raw_records,
+        )
+
+    @cached_property
+    def tickets_api(self) -> Any:
+        from .transport import AsyncTicketsApi
+        return AsyncTicketsApi(self.api_client)
+
+    @cached_property
+    def agents_api(self) -> Any:
+        from .transport import AsyncAgentsApi
+        return AsyncAgentsApi(self.api_client)
+
+    @cached_property
+    def contacts_api(self) -> Any:
+        from .transport import AsyncContactsApi
+        return AsyncContactsApi(self.api_client)
+
+    @cached_property
+    def departments_api(self) -> Any:
+        from .transport import AsyncDepartmentsApi
+        return AsyncDepartmentsApi(self.api_client)
+
+    @cached_property
+    def messages_api(self) -> Any:
+        from .transport import AsyncMessagesApi
+        return AsyncMessagesApi(self.api_client)
+
+    @cached_property
+    def companies_api(self) -> Any:
+        from .transport import AsyncCompaniesApi
+        return AsyncCompaniesApi(self.api_client)
+
+    @cached_property
+    def chats_api(self) -> Any:
+        from .transport import AsyncChatsApi
+        return AsyncChatsApi(self.api_client)
+
+    @cached_property
+    def calls_api(self) -> Any:
+        from .transport import AsyncCallsApi
+        return AsyncCallsApi(self.api_client)
+
+    @cached_property
+    def response_cache(self) -> ResponseCache:
+        # Read-only lookups are cached per entity type; writes invalidate the matching entry
+        settings = self.settings
+        cache = ResponseCache(
+            max_size=settings.cache_size,
+            ttls={
+                "ticket": settings.cache_ttl_ticket,
+                "agent": settings.cache_ttl_agent,
+                "agents": settings.cache_ttl_agent,
+                "contact": settings.cache_ttl_contact,
+                "company": settings.cache_ttl_contact,
+                "departments": settings.cache_ttl_department,
+            },
+        )
+
+        def collect() -> None:
+            CACHE_LOOKUPS.set(cache.hits, tenant=self.name, cache="response", result="hit")
+            CACHE_LOOKUPS.set(cache.misses, tenant=self.name, cache="response", result="miss")
+            CACHE_ENTRIES.set(len(cache), tenant=self.name, cache="response")
+
+        metrics.add_collector(collect)
+        return cache
+
+    @cached_property
+    def result_store(self) -> Any:
+        # Large listings kept for next_page, so paging through them doesn't query the API again
+        from .cursors import ResultStore
+
+        store = ResultStore(max_bytes=self.settings.result_store_bytes, ttl=self.settings.result_ttl)
+
+        def collect() -> None:
+            CACHE_LOOKUPS.set(store.hits, tenant=self.name, cache="results", result="hit")
+            CACHE_LOOKUPS.set(store.misses, tenant=self.name, cache="results", result="miss")
+            CACHE_ENTRIES.set(len(store), tenant=self.name, cache="results")
+
+        metrics.add_collector(collect)
+        return store
+
+    @cached_property
+    def write_results(self) -> Any:
+        # Results of recent writes by idempotency key, so retried writes aren't applied twice
+        from .writes import WriteResults
+
+        results = WriteResults(
+            max_entries=self.settings.idempotency_max_entries, ttl=self.settings.idempotency_ttl
+        )
+
+        def collect() -> None:
+            CACHE_LOOKUPS.set(results.hits, tenant=self.name, cache="idempotency", result="hit")
+            CACHE_LOOKUPS.set(results.misses, tenant=self.name, cache="idempotency", result="miss")
+            CACHE_ENTRIES.set(len(results), tenant=self.name, cache="idempotency")
+
+        metrics.add_collector(collect)
+        return results
+
+    @cached_property
+    def ticket_writes(self) -> Any:
+        # Updates of one ticket run one at a time, queued ones are merged
+        from .writes import EntityQueue
+
+        return EntityQueue()
+
+    @cached_property
+    def message_reader(self) -> Any:
+        from .messages import MessageCache, MessageReader
+
+        # Full message pages never change, so they are kept for good (on disk if configured)
+        return MessageReader(
+            self.messages_api,
+            MessageCache(
+                max_pages=self.settings.message_cache_pages,
+                directory=self.settings.message_cache_dir or None,
+            ),
+        )
+
+    @cached_property
+    def directory(self) -> Optional[Any]:
+        # Agents and departments kept in memory to name them in ticket output
+        if self.settings.directory_refresh_interval <= 0:
+            return None
+        from .directory import Directory
+
+        return Directory(
+            self.agents_api, self.departments_api,
+            page_size=self.settings.page_size, page_concurrency=self.settings.page_concurrency,
+        )
+
+    @cached_property
+    def ticket_mirror(self) -> Optional[Any]:
+        # Optional local full-text index used by search_tickets while it is fresh
+        if not self.settings.mirror_path:
+            return None
+        from .mirror import TicketMirror
+
+        return TicketMirror(
+            self.settings.mirror_path, self.tickets_api, self.messages_api,
+            page_size=self.settings.page_size,
+            max_staleness=self.settings.mirror_max_staleness,
+        )
+
+    @cached_property
+    def contact_index(self) -> Optional[Any]:
+        # Optional in-memory contact index used by list_contacts and create_contact while it is fresh
+        if not self.settings.contact_index:
+            return None
+        from .contact_index import ContactIndex
+
+        return ContactIndex(
+            self.contacts_api,
+            page_size=self.settings.page_size,
+            max_staleness=self.settings.contact_index_max_staleness,
+        )
+
+    @cached_property
+    def change_feeds(self) -> Any:
+        from .changes import ChangeFeeds
+
+        return ChangeFeeds(
+            self.tickets_api, page_size=self.settings.page_size, max_tracked=self.settings.change_feed_max_tracked
+        )
+
+    @cached_property
+    def change_notifier(self) -> Any:
+        from .changes import ChangeNotifier
+
+        return ChangeNotifier(self.tickets_api)
+
+    @cached_property
+    def live_poller(self) -> Any:
+        # Chats and calls polled once for all sessions
+        from .live import LivePoller
+
+        settings = self.settings
+        return LivePoller(
+            self.chats_api, self.calls_api, limit=settings.live_poll_limit,
+            min_interval=settings.live_poll_min_interval, max_interval=settings.live_poll_max_interval,
+        )
+
+    def start(self) -> None:
+        """Start the background syncs this instance is configured for."""
+        # Also called from within the first tool call of a tenant, whose deadline they mustn't inherit
+        settings = self.settings
+        if self.directory is not None:
+            self._tasks.append(spawn(self.directory.run(settings.directory_refresh_interval), background=True))
+        if self.ticket_mirror is not None:
+            print(f"Ticket mirror ({self.name}): {settings.mirror_path}", file=sys.stderr)
+            self._tasks.append(spawn(self.ticket_mirror.run(settings.mirror_sync_interval), background=True))
+        if settings.change_poll_interval > 0:
+            self._tasks.append(spawn(self.change_notifier.run(settings.change_poll_interval), background=True))
+        if self.contact_index is not None:
+            self._tasks.append(spawn(self.contact_index.run(settings.contact_index_sync_interval), background=True))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Only tear down what was actually created
+        if "live_poller" in self.__dict__:
+            await self.live_poller.close()
+        if "ticket_mirror" in self.__dict__ and self.ticket_mirror is not None:
+            self.ticket_mirror.close()
+        if "api_client" in self.__dict__:
+            await self.api_client.close()
+
+
+class Tenants:
+    """LiveAgent instances by tenant name, each created on first use.
+
+    Every tenant gets its own :class:`LiveAgentInstance`, so connection pools,
+    rate limiters, retry budgets, caches and background syncs are never shared
+    between accounts. Once :meth:`start` was called, an instance starts its
+    background syncs when it is created.
+    """
+
+    def __init__(self, settings: Dict[str, Settings], default: Optional[str] = None):
+        self.settings = settings
+        self.default = default
+        self.running = False
+        self._instances: Dict[str, LiveAgentInstance] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.settings)
+
+    def get(self, name: Optional[str] = None) -> LiveAgentInstance:
+        name = name or self.default
+        if name is None:
+            raise ToolInputError(f"Several tenants are configured, pass tenant (one of: {', '.join(self.names)})")
+        instance = self._instances.get(name)
+        if instance is None:
+            if name not in self.settings:
+                raise ToolInputError(f"Unknown tenant {name!r}, expected one of: {', '.join(self.names)}")
+            instance = self._instances[name] = LiveAgentInstance(self.settings[name], name)
+            if self.running:
+                instance.start()
+        return instance
+
+    def start(self) -> None:
+        self.running = True
+        for instance in self._instances.values():
+            instance.start()
+
+    async def close(self) -> None:
+        self.running = False
+        instances, self._instances = list(self._instances.values()), {}
+        await asyncio.gather(*(instance.close() for instance in instances))
+
+
+_tenants: Optional[Tenants] = None
+
+# Instance selected for the current tool call or request, see use_tenant()
+_current: contextvars.ContextVar[Optional[LiveAgentInstance]] = contextvars.ContextVar(
+    "liveagent_instance", default=None)
+
+
+def get_tenants() -> Tenants:
+    global _tenants
+    if _tenants is None:
+        settings = get_settings()
+        settings.validate()
+        if settings.tenants_file:
+            _tenants = Tenants(*load_tenants(settings.tenants_file))
+        else:
+            _tenants = Tenants({"default": settings}, "default")
+    return _tenants
+
+
+def get_instance() -> LiveAgentInstance:
+    """Instance of the tenant selected with :func:`use_tenant`, else of the default tenant."""
+    instance = _current.get()
+    if instance is None:
+        instance = get_tenants().get()
+    return instance
+
+
+@contextmanager
+def use_tenant(name: Optional[str]) -> Iterator[LiveAgentInstance]:
+    # Tasks started inside copy the context, so they stay on the same tenant
+    token = _current.set(get_tenants().get(name))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
@@ -0,0 +1,148 @@
+import asyncio
+import sys
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+from .deadline import spawn
+from .singleflight import SingleFlight
+
+CHATS_URI = "liveagent://chats"
+CALLS_URI = "liveagent://calls"
+
+# Calls waiting in the queue, ringing or in progress
+ACTIVE_CALL_STATUSES = ("Q", "R", "C")
+
+
+def _fingerprint(records: List[Any]) -> Tuple:
+    # What subscribers are told about: a record appearing, leaving, or changing status or agent
+    return tuple(sorted(
+        (str(getattr(r, "id", None)), str(getattr(r, "status", None)),
+         str(getattr(r, "agentid", None) or getattr(r, "agent_id", None)))
+        for r in records
+    ))
+
+
+class LivePoller:
+    """One background poll of chats and calls shared by every session.
+
+    Each poll makes one request for chats and one for calls, however many
+    sessions are reading or subscribed, and tools answer from the last poll.
+    The interval starts at ``min_interval`` and doubles up to ``max_interval``
+    while nothing changes; any change brings it back down. Polling pauses when
+    nobody is subscribed and no tool has read the data for a while, and resumes
+    on the next read or subscription. Subscribers of ``liveagent://chats`` or
+    ``liveagent://calls`` get a resource updated notification on changes.
+    """
+
+    def __init__(self, chats_api: Any, calls_api: Any, limit: int = 100,
+                 min_interval: float = 2.0, max_interval: float = 30.0):
+        self.apis = {"chats": chats_api.get_chats_list, "calls": calls_api.get_calls_list}
+        self.uris = {"chats": CHATS_URI, "calls": CALLS_URI}
+        self.limit = limit
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.records: Dict[str, List[Any]] = {"chats": [], "calls": []}
+        self.subscribers: Dict[str, "weakref.WeakSet"] = {kind: weakref.WeakSet() for kind in self.apis}
+        self.last_poll: Optional[float] = None
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._last_read = float("-inf")
+        self._wake = asyncio.Event()
+        self._flight = SingleFlight()
+        self._task: Optional[asyncio.Task] = None
+
+    def kind_of(self, uri: str) -> Optional[str]:
+        return next((kind for kind, kind_uri in self.uris.items() if kind_uri == uri), None)
+
+    def is_active(self) -> bool:
+        return (any(len(s) for s in self.subscribers.values())
+                or time.monotonic() - self._last_read < 2 * self.max_interval)
+
+    def _touch(self) -> None:
+        # Starts the poller on first use and wakes it when paused; reads while it's
+        # running don't add polls
+        if self._task is None or self._task.done():
+            self._task = spawn(self.run(), background=True)
+        was_active = self.is_active()
+        self._last_read = time.monotonic()
+        if not was_active:
+            self.interval = self.min_interval
+            self._wake.set()
+
+    def subscribe(self, uri: str, session: Any) -> None:
+        self._touch()
+        self.subscribers[self.kind_of(uri)].add(session)
+
+    def unsubscribe(self, uri: str, session: Any) -> None:
+        self.subscribers[self.kind_of(uri)].discard(session)
+
+    async def poll(self) -> List[str]:
+        """Fetch chats and calls and notify subscribers; returns the kinds that changed."""
+        # Concurrent callers share one poll
+        return await self._flight.do("poll", self._poll)
+
+    async def _poll(self) -> List[str]:
+        results = await asyncio.gather(*(
+            fetch(per_page=self.limit, page=1, sort_field="date_created", sort_dir="DESC")
+            for fetch in self.apis.values()
+        ))
+        changed = []
+        for kind, records in zip(self.apis, results):
+            records = records or []
+            fingerprint = _fingerprint(records)
+            if kind in self._fingerprints and fingerprint != self._fingerprints[kind]:
+                changed.append(kind)
+            self._fingerprints[kind] = fingerprint
+            self.records[kind] = records
+        self.last_poll = time.time()
+        for kind in changed:
+            await self.notify(kind)
+        return changed
+
+    def age(self) -> Optional[float]:
+        return None if self.last_poll is None else time.time() - self.last_poll
+
+    async def get(self, kind: str) -> List[Any]:
+        self._touch()
+        age = self.age()
+        if age is None or age > self.max_interval:
+            # Paused or not started yet
+            await self.poll()
+        return self.records[kind]
+
+    async def notify(self, kind: str) -> None:
+        uri = self.uris[kind]
+        for session in list(self.subscribers[kind]):
+            try:
+                await session.send_resource_updated(uri)
+            except Exception:
+                # The session is gone
+                self.subscribers[kind].discard(session)
+
+    async def run(self) -> None:
+        while True:
+            active = self.is_active()
+            age = self.age()
+            # A read that found the data stale has just polled itself
+            if active and (age is None or age >= self.min_interval):
+                try:
+                    changed = await self.poll()
+                except Exception as e:
+                    print(f"Chat and call poll failed: {e}", file=sys.stderr)
+                    changed = []
+                if changed:
+                    self.interval = self.min_interval
+                else:
+                    self.interval = min(self.interval * 2, self.max_interval)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval if active else None)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
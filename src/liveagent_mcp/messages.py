@@ -0,0 +1,143 @@
+import base64
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from .errors import ToolInputError
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"[ \t]+")
+
+
+def html_to_text(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    return _SPACE_RE.sub(" ", _TAG_RE.sub(" ", text)).strip()
+
+
+def flatten_groups(groups: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    """Turn SDK message groups into plain dicts, one per message, in conversation order."""
+    messages = []
+    for group in groups or []:
+        author = getattr(group, "user_full_name", None) or getattr(group, "userid", None)
+        for message in getattr(group, "messages", None) or []:
+            messages.append({
+                "id": getattr(message, "id", None),
+                "date": getattr(message, "datecreated", None) or getattr(group, "datecreated", None),
+                "author": getattr(message, "user_full_name", None) or author,
+                "type": getattr(message, "type", None) or getattr(group, "type", None),
+                "text": html_to_text(getattr(message, "message", None)),
+            })
+    return messages
+
+
+def encode_cursor(page: int, index: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([page, index]).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    if not cursor:
+        return 1, 0
+    try:
+        page, index = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(page), int(index)
+    except (ValueError, TypeError):
+        raise ToolInputError(f"Invalid cursor: {cursor}")
+
+
+class MessageCache:
+    """LRU cache of complete message pages per ticket, optionally persisted to disk.
+
+    Posted messages never change, so a page that came back full stays valid for
+    good; the last, partially filled page of a conversation is never cached.
+    """
+
+    def __init__(self, max_pages: int = 1024, directory: Optional[str] = None):
+        self.max_pages = max_pages
+        self.directory = directory
+        self._pages: "OrderedDict[Tuple[str, int, int], List[Dict[str, Any]]]" = OrderedDict()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: Tuple[str, int, int]) -> str:
+        ticket_id, per_page, page = key
+        return os.path.join(self.directory, f"{quote(ticket_id, safe='')}-{per_page}-{page}.json")
+
+    def get(self, ticket_id: str, per_page: int, page: int) -> Optional[List[Dict[str, Any]]]:
+        key = (ticket_id, per_page, page)
+        messages = self._pages.get(key)
+        if messages is not None:
+            self._pages.move_to_end(key)
+            return messages
+        if self.directory:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    messages = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._remember(key, messages)
+        return messages
+
+    def put(self, ticket_id: str, per_page: int, page: int, messages: List[Dict[str, Any]]) -> None:
+        key = (ticket_id, per_page, page)
+        self._remember(key, messages)
+        if self.directory:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(messages, f)
+            os.replace(tmp_path, self._path(key))
+
+    def _remember(self, key: Tuple[str, int, int], messages: List[Dict[str, Any]]) -> None:
+        self._pages[key] = messages
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+
+class MessageReader:
+    """Reads a ticket conversation page by page through ``messages_api``.
+
+    Results are cut at ``max_chars`` and carry an opaque cursor to continue from.
+    """
+
+    def __init__(self, messages_api: Any, cache: MessageCache, page_size: int = 50):
+        self.messages_api = messages_api
+        self.cache = cache
+        self.page_size = page_size
+
+    async def _page(self, ticket_id: str, page: int) -> Tuple[List[Dict[str, Any]], bool]:
+        messages = self.cache.get(ticket_id, self.page_size, page)
+        if messages is not None:
+            return messages, True
+        groups = await self.messages_api.get_ticket_messages_list(
+            ticket_id=ticket_id, per_page=self.page_size, page=page
+        ) or []
+        messages = flatten_groups(groups)
+        full = len(groups) >= self.page_size
+        if full:
+            self.cache.put(ticket_id, self.page_size, page, messages)
+        return messages, full
+
+    async def read(self, ticket_id: str, cursor: Optional[str] = None, max_chars: int = 8000,
+                   max_message_chars: int = 2000) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        page, index = decode_cursor(cursor)
+        result: List[Dict[str, Any]] = []
+        used = 0
+        while True:
+            messages, full = await self._page(ticket_id, page)
+            while index < len(messages):
+                message = dict(messages[index])
+                if len(message["text"]) > max_message_chars:
+                    message["text"] = message["text"][:max_message_chars] + "..."
+                # Always return at least one message so a cursor can make progress
+                if result and used + len(message["text"]) > max_chars:
+                    return result, encode_cursor(page, index)
+                result.append(message)
+                used += len(message["text"])
+                index += 1
+            if not full:
+                return result, None
+            page, index = page + 1, 0
@@ -0,0 +1,307 @@
+import asyncio
+import bisect
+import contextvars
+import math
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from cache hits up to long fetch_all scans
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels) -> None:
+        # Lets a collector mirror a total that is kept elsewhere
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in sorted(self._values.items()):
+            yield self.name, self._labels(key), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum, count
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+        counts, totals = entry
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        # Upper bound of the bucket holding the q-th observation, good enough for reports
+        entry = self._values.get(self._key(labels))
+        if entry is None or not entry[1][1]:
+            return None
+        counts, totals = entry
+        rank = q * totals[1]
+        seen = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def samples(self) -> Iterable[Sample]:
+        for key, (counts, totals) in sorted(self._values.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative
+            yield f"{self.name}_sum", labels, totals[0]
+            yield f"{self.name}_count", labels, totals[1]
+
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and histograms rendered in Prometheus text format.
+
+    Collectors are callbacks run before rendering to refresh values that live
+    elsewhere, such as cache sizes, so nothing has to be pushed on every change.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+TOOL_DURATION = metrics.histogram(
+    "liveagent_tool_duration_seconds", "Tool call latency", ["tool"])
+TOOL_CALLS = metrics.counter(
+    "liveagent_tool_calls_total", "Tool calls by outcome (ok, invalid, timeout, api_error, error)", ["tool", "outcome"])
+TOOL_ERRORS = metrics.counter(
+    "liveagent_tool_api_errors_total", "Tool calls failed by a LiveAgent API error, by HTTP status (0 is a network error)",
+    ["tool", "status"])
+TOOL_IN_FLIGHT = metrics.gauge(
+    "liveagent_tool_in_flight", "Tool calls currently running", ["tool"])
+TOOL_UPSTREAM_REQUESTS = metrics.histogram(
+    "liveagent_tool_upstream_requests", "Upstream HTTP requests made per tool call", ["tool"],
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250))
+UPSTREAM_DURATION = metrics.histogram(
+    "liveagent_upstream_request_duration_seconds", "LiveAgent API request latency per attempt", ["operation"])
+UPSTREAM_REQUESTS = metrics.counter(
+    "liveagent_upstream_requests_total", "LiveAgent API request attempts by HTTP status (0 is a network error)",
+    ["operation", "status"])
+UPSTREAM_IN_FLIGHT = metrics.gauge(
+    "liveagent_upstream_in_flight", "LiveAgent API requests currently in flight", ["operation"])
+UPSTREAM_HEDGES = metrics.counter(
+    "liveagent_upstream_hedged_requests_total",
+    "Reads sent twice because the first request was slow, by whether the second copy answered first (won, lost)",
+    ["operation", "result"])
+CACHE_LOOKUPS = metrics.counter(
+    "liveagent_cache_lookups_total", "Response cache lookups by result (hit, miss)", ["tenant", "cache", "result"])
+CACHE_ENTRIES = metrics.gauge(
+    "liveagent_cache_entries", "Entries currently held by a cache", ["tenant", "cache"])
+
+# Upstream requests made on behalf of the current tool call; a one-item list so
+# tasks spawned by the handler (which copy the context) add to the same counter
+_upstream_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "liveagent_upstream_counter", default=None)
+
+
+def detach_tool_call() -> None:
+    # Requests made from here on in this context aren't counted for the current tool call
+    _upstream_counter.set(None)
+
+
+class track_tool:
+    """Context manager recording latency, in-flight count and upstream requests of one tool call."""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.outcome = "ok"
+        self.status: Optional[int] = None
+
+    def __enter__(self) -> "track_tool":
+        self._start = time.perf_counter()
+        self._counter = [0]
+        self._token = _upstream_counter.set(self._counter)
+        TOOL_IN_FLIGHT.inc(tool=self.tool)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _upstream_counter.reset(self._token)
+        TOOL_IN_FLIGHT.dec(tool=self.tool)
+        TOOL_DURATION.observe(time.perf_counter() - self._start, tool=self.tool)
+        TOOL_UPSTREAM_REQUESTS.observe(self._counter[0], tool=self.tool)
+        if exc_type is not None and self.outcome == "ok":
+            self.outcome = "error"
+        TOOL_CALLS.inc(tool=self.tool, outcome=self.outcome)
+        if self.status is not None:
+            TOOL_ERRORS.inc(tool=self.tool, status=self.status)
+
+
+class track_upstream:
+    """Context manager recording one LiveAgent API request attempt."""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.status = 0
+
+    def __enter__(self) -> "track_upstream":
+        self._start = time.perf_counter()
+        counter = _upstream_counter.get()
+        if counter is not None:
+            counter[0] += 1
+        UPSTREAM_IN_FLIGHT.inc(operation=self.operation)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        UPSTREAM_IN_FLIGHT.dec(operation=self.operation)
+        UPSTREAM_DURATION.observe(time.perf_counter() - self._start, operation=self.operation)
+        UPSTREAM_REQUESTS.inc(operation=self.operation, status=self.status)
+
+
+def write_textfile(path: str) -> None:
+    # Written atomically so the node_exporter textfile collector never reads a partial file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(metrics.render())
+    os.replace(tmp_path, path)
+
+
+async def run_textfile_writer(path: str, interval: float) -> None:
+    try:
+        while True:
+            try:
+                write_textfile(path)
+            except OSError as e:
+                print(f"Writing metrics to {path} failed: {e}", file=sys.stderr)
+            await asyncio.sleep(interval)
+    finally:
+        try:
+            write_textfile(path)
+        except OSError:
+            pass
+
+
+async def start_http_server(host: str, port: int) -> asyncio.AbstractServer:
+    """Serve the metrics in Prometheus text format on ``http://host:port/metrics``."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Headers are not needed, but must be consumed before replying
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/metrics", "/"):
+                status, body = "200 OK", metrics.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
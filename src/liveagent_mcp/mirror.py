@@ -0,0 +1,180 @@
+import asyncio
+import json
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+from .messages import flatten_groups
+from .pagination import iter_changed_records, iter_pages
+from .ratelimit import background_requests
+
+TICKET_COLUMNS = (
+    "id", "code", "subject", "status", "channel_type", "departmentid", "agentid",
+    "owner_name", "owner_email", "date_created", "date_changed",
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS tickets ({", ".join(c + (" TEXT PRIMARY KEY" if c == "id" else " TEXT") for c in TICKET_COLUMNS)});
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(ticket_id UNINDEXED, subject, body);
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(query: str) -> Optional[str]:
+    # Every word must match; the last one also matches as a prefix ("refu" finds "refund")
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class TicketMirror:
+    """Local SQLite copy of tickets and their messages with an FTS5 index.
+
+    The mirror syncs incrementally: each run pages through ``get_tickets_list``
+    for tickets whose ``date_changed`` is at or after the stored watermark (see
+    :func:`iter_changed_records`), upserts them together with their message text
+    and advances the watermark.
+    All database access runs on one worker thread, so the event loop never blocks.
+    """
+
+    def __init__(self, path: str, tickets_api: Any, messages_api: Any,
+                 page_size: int = 100, max_staleness: float = 300.0,
+                 message_concurrency: int = 4):
+        self.path = path
+        self.tickets_api = tickets_api
+        self.messages_api = messages_api
+        self.page_size = page_size
+        self.max_staleness = max_staleness
+        self.message_concurrency = message_concurrency
+        self.last_sync: Optional[float] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="liveagent-mirror")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._sync_lock = asyncio.Lock()
+
+    async def _db(self, fn, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _store(self, rows: List[tuple], bodies: List[tuple], watermark: Optional[str]) -> None:
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO tickets ({', '.join(TICKET_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in TICKET_COLUMNS)})",
+                rows,
+            )
+            conn.executemany("DELETE FROM tickets_fts WHERE ticket_id = ?", [(row[0],) for row in rows])
+            conn.executemany("INSERT INTO tickets_fts (ticket_id, subject, body) VALUES (?, ?, ?)", bodies)
+            if watermark is not None:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('watermark', ?)", (watermark,))
+
+    def _set_meta(self, key: str, value: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _search(self, match: str, limit: int) -> List[SimpleNamespace]:
+        # bm25 weights: ticket_id (unindexed), subject, body
+        rows = self._connect().execute(
+            f"SELECT {', '.join('t.' + c for c in TICKET_COLUMNS)} FROM tickets_fts f "
+            "JOIN tickets t ON t.id = f.ticket_id "
+            "WHERE tickets_fts MATCH ? ORDER BY bm25(tickets_fts, 0.0, 10.0, 1.0) LIMIT ?",
+            (match, limit),
+        ).fetchall()
+        return [SimpleNamespace(**dict(row)) for row in rows]
+
+    def is_fresh(self) -> bool:
+        return self.last_sync is not None and time.time() - self.last_sync <= self.max_staleness
+
+    async def _message_text(self, ticket_id: str, semaphore: asyncio.Semaphore) -> str:
+        async def fetch_page(page: int) -> Any:
+            async with semaphore:
+                return await self.messages_api.get_ticket_messages_list(
+                    ticket_id=ticket_id, per_page=self.page_size, page=page,
+                )
+
+        texts: List[str] = []
+        # Most conversations fit on one page, so don't fetch ahead
+        async for groups in iter_pages(fetch_page, self.page_size, concurrency=1):
+            texts.extend(message["text"] for message in flatten_groups(groups) if message["text"])
+        return "\n".join(texts)
+
+    async def sync(self) -> int:
+        """Fetch tickets changed since the watermark; returns the number of tickets stored."""
+        # The first sync reads every message of every ticket, so it yields to tool calls
+        with background_requests():
+            return await self._sync()
+
+    async def _sync(self) -> int:
+        async with self._sync_lock:
+            if self.last_sync is None:
+                last_sync = await self._db(self._get_meta, "last_sync")
+                self.last_sync = float(last_sync) if last_sync else None
+            watermark = await self._db(self._get_meta, "watermark")
+            semaphore = asyncio.Semaphore(max(1, self.message_concurrency))
+
+            def fetch_page(since: Optional[str], page: int) -> Any:
+                return self.tickets_api.get_tickets_list(
+                    filters=json.dumps([["date_changed", ">=", since]]) if since else None,
+                    sort_field="date_changed", sort_dir="ASC", per_page=self.page_size, page=page,
+                )
+
+            stored = 0
+            async for tickets in iter_changed_records(fetch_page, self.page_size, watermark or None):
+                bodies = await asyncio.gather(
+                    *(self._message_text(ticket.id, semaphore) for ticket in tickets)
+                )
+                rows = [tuple(getattr(ticket, c, None) for c in TICKET_COLUMNS) for ticket in tickets]
+                changed = [ticket.date_changed for ticket in tickets if getattr(ticket, "date_changed", None)]
+                if changed:
+                    watermark = max([watermark or ""] + changed)
+                await self._db(
+                    self._store, rows,
+                    [(row[0], row[2] or "", body) for row, body in zip(rows, bodies)],
+                    watermark,
+                )
+                stored += len(rows)
+
+            # Only a finished sync counts, so a restart during the first one doesn't serve a partial mirror
+            self.last_sync = time.time()
+            await self._db(self._set_meta, "last_sync", str(self.last_sync))
+            return stored
+
+    async def search(self, query: str, limit: int = 20) -> List[SimpleNamespace]:
+        match = fts_query(query)
+        if match is None:
+            return []
+        return await self._db(self._search, match, limit)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Ticket mirror sync failed: {e}", file=sys.stderr)
+            await asyncio.sleep(interval)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._executor.submit(self._conn.close).result()
+            self._conn = None
+        self._executor.shutdown(wait=False)
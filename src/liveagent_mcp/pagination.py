@@ -0,0 +1,118 @@
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, List, Optional, Set
+
+
+async def iter_pages(fetch_page: Callable[[int], Awaitable[Optional[List[Any]]]],
+                     per_page: int,
+                     max_items: Optional[int] = None,
+                     concurrency: int = 4) -> AsyncIterator[List[Any]]:
+    """Yield pages ``1..n`` in order while fetching up to ``concurrency`` pages ahead.
+
+    Paging stops at the first short page or once ``max_items`` records have been
+    requested; page fetches still in flight at that point are cancelled.
+    """
+    max_pages = None
+    if max_items is not None:
+        max_pages = max(1, -(-max_items // per_page))
+
+    pending: Deque[asyncio.Task] = deque()
+    next_page = 1
+
+    def schedule() -> None:
+        nonlocal next_page
+        while len(pending) < max(1, concurrency) and (max_pages is None or next_page <= max_pages):
+            pending.append(asyncio.ensure_future(fetch_page(next_page)))
+            next_page += 1
+
+    try:
+        schedule()
+        while pending:
+            page = await pending.popleft() or []
+            if page:
+                yield page
+            if len(page) < per_page:
+                break
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def iter_unique_records(fetch_page: Callable[[int], Awaitable[Optional[List[Any]]]],
+                              per_page: int,
+                              max_items: Optional[int] = None,
+                              concurrency: int = 4) -> AsyncIterator[List[Any]]:
+    """Like :func:`iter_pages`, but drops records whose ``id`` was already yielded.
+
+    Records can shift between pages while paging through a changing list, so the
+    same record may show up on two consecutive pages. Output stops at ``max_items``.
+    """
+    seen = set()
+    remaining = max_items
+    async for page in iter_pages(fetch_page, per_page, max_items, concurrency):
+        records = []
+        for record in page:
+            record_id = getattr(record, "id", None)
+            if record_id is not None:
+                if record_id in seen:
+                    continue
+                seen.add(record_id)
+            records.append(record)
+        if remaining is not None:
+            records = records[:remaining]
+            remaining -= len(records)
+        if records:
+            yield records
+        if remaining is not None and remaining <= 0:
+            break
+
+
+async def fetch_range(fetch_page: Callable[[int], Awaitable[Optional[List[Any]]]],
+                      offset: int, limit: int) -> List[Any]:
+    """Records ``offset..offset + limit`` of a list that is only addressable by page.
+
+    Pages of ``limit`` records are used; an offset that isn't a multiple of the
+    limit straddles two pages, which are then fetched concurrently and sliced.
+    """
+    first_page, skip = divmod(offset, limit)
+    pages = [first_page + 1, first_page + 2] if skip else [first_page + 1]
+    results = await asyncio.gather(*(fetch_page(page) for page in pages))
+    records = [record for page in results for record in (page or [])]
+    return records[skip:skip + limit]
+
+
+async def iter_changed_records(fetch_page: Callable[[Optional[str], int], Awaitable[Optional[List[Any]]]],
+                               per_page: int,
+                               since: Optional[str] = None) -> AsyncIterator[List[Any]]:
+    """Yield records changed at or after ``since``, oldest first, page by page.
+
+    ``fetch_page(since, page)`` lists records with ``date_changed >= since``
+    sorted by ``date_changed`` ascending. Paging by offset through that list
+    skips a record whenever one before it changes and moves to the end, so each
+    page is instead queried again from the latest ``date_changed`` seen, dropping
+    the records already yielded with that value. Only while a whole page shares
+    one ``date_changed`` does paging move on by page number.
+    """
+    last = since
+    seen: Set[Any] = set()
+    page = 1
+    while True:
+        records = await fetch_page(last, page) or []
+        fresh = [record for record in records
+                 if (getattr(record, "date_changed", None) or "") != (last or "")
+                 or getattr(record, "id", None) not in seen]
+        if fresh:
+            yield fresh
+        if len(records) < per_page:
+            return
+        top = max(getattr(record, "date_changed", None) or "" for record in records)
+        ids = {getattr(record, "id", None) for record in records
+               if (getattr(record, "date_changed", None) or "") == top}
+        if top != (last or ""):
+            last, seen, page = top, ids, 1
+        else:
+            seen |= ids
+            page += 1
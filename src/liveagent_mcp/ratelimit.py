@@ -0,0 +1,212 @@
+import asyncio
+import contextvars
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Iterator, Optional
+
+from .deadline import remaining
+from .metrics import UPSTREAM_HEDGES
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+# Set while requests are made for background work such as the mirror sync
+_background: contextvars.ContextVar[bool] = contextvars.ContextVar("liveagent_background", default=False)
+
+
+@contextmanager
+def background_requests() -> Iterator[None]:
+    """Give the requests made within the lower priority of background work, see :class:`RateLimiter`."""
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+class RateLimiter:
+    """Token bucket shared by every API call, adapting its rate to upstream throttling.
+
+    A 429 response halves the current rate (never below ``min_rate``) and pauses
+    all callers for the ``Retry-After`` period; every successful response then
+    raises the rate by a small step until it is back at ``rate``. Background
+    requests only take a token while ``reserve`` more are left, so a long sync
+    uses the rate that tool calls leave idle and never makes them wait.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: Optional[float] = None,
+                 reserve: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        # Half the burst by default; background requests need room for one token above it
+        max_reserve = max(0.0, self.burst - 1)
+        self.reserve = min(reserve, max_reserve) if reserve is not None else max_reserve / 2
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        needed = 1 + self.reserve if _background.get() else 1
+        while True:
+            now = self._clock()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            self._refill(now)
+            if self._tokens >= needed:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((needed - self._tokens) / self.rate)
+
+    def on_success(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        now = self._clock()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, 0.0)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+
+class RetryBudget:
+    """Caps retries at a fraction of recent traffic across all callers.
+
+    Every request deposits ``ratio`` tokens and every retry withdraws one, with
+    the balance capped at ``min_retries`` so idle periods don't bank a retry storm.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._balance = float(min_retries)
+
+    def record_request(self) -> None:
+        self._balance = min(float(self.min_retries), self._balance + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        if self._balance < 1:
+            return False
+        self._balance -= 1
+        return True
+
+
+class RetryPolicy:
+    """Decides which failed requests are retried and how long to back off."""
+
+    # 0 is used by the transport for connection errors and timeouts
+    RETRYABLE_STATUSES = frozenset({0, 429, 500, 502, 503, 504})
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_cap: float = 30.0,
+                 budget: Optional[RetryBudget] = None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.budget = budget
+
+    def should_retry(self, method: str, status: int, attempt: int) -> bool:
+        if attempt >= self.max_retries or status not in self.RETRYABLE_STATUSES:
+            return False
+        # A 429 means the request was rejected before processing, so it is safe to repeat
+        if status != 429 and method not in self.IDEMPOTENT_METHODS:
+            return False
+        return self.budget is None or self.budget.try_withdraw()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        # Full jitter: uniformly random up to the exponential bound
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_cap))
+        return delay
+
+
+class HedgePolicy:
+    """Sends a second copy of slow reads and uses whichever response comes first.
+
+    Only the listed ``operations`` are hedged, which must be idempotent reads. The
+    copy goes out once a request has taken longer than the ``quantile`` of the
+    recent latencies of its operation (at least ``min_delay``), so only the slowest
+    requests are sent twice. Until ``min_samples`` latencies are known nothing is
+    hedged. Copies are capped by ``budget`` like retries, and none is sent when the
+    deadline of the tool call would pass before it.
+    """
+
+    def __init__(self, operations: Iterable[str], quantile: float = 0.95, min_delay: float = 0.05,
+                 window: int = 200, min_samples: int = 20, budget: Optional[RetryBudget] = None):
+        self.operations = frozenset(operations)
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.budget = budget
+        self._latencies: Dict[str, Deque[float]] = {
+            operation: deque(maxlen=window) for operation in self.operations
+        }
+
+    def applies(self, operation: str) -> bool:
+        return operation in self.operations
+
+    def observe(self, operation: str, seconds: float) -> None:
+        latencies = self._latencies.get(operation)
+        if latencies is not None:
+            latencies.append(seconds)
+
+    def delay(self, operation: str) -> Optional[float]:
+        latencies = self._latencies.get(operation)
+        if latencies is None or len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))])
+
+    async def run(self, operation: str, request: Callable[[], Awaitable[Any]]) -> Any:
+        if self.budget is not None:
+            self.budget.record_request()
+        delay = self.delay(operation)
+        tasks = [asyncio.ensure_future(request())]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                left = remaining()
+                if (not done and (left is None or left > delay)
+                        and (self.budget is None or self.budget.try_withdraw())):
+                    tasks.append(asyncio.ensure_future(request()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1:
+                            UPSTREAM_HEDGES.inc(operation=operation, result="won" if task is tasks[1] else "lost")
+                        return task.result()
+                    # Raised if the other copy fails too
+                    if error is None or task is tasks[0]:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
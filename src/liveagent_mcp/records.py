@@ -0,0 +1,56 @@
+import json
+from typing import Any, Dict, List
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+    loads = json.loads
+
+
+class Record:
+    """Lightweight list record built straight from parsed JSON.
+
+    Only the fields in ``__slots__`` are kept; fields missing from the response
+    are ``None``. Used instead of the generated SDK models for list endpoints,
+    where building a model per record dominates the cost of a page.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        record = cls.__new__(cls)
+        get = data.get
+        for name in cls.__slots__:
+            setattr(record, name, get(name))
+        return record
+
+    @classmethod
+    def from_json(cls, content: bytes) -> List["Record"]:
+        data = loads(content) if content else None
+        if not isinstance(data, list):
+            return []
+        from_dict = cls.from_dict
+        return [from_dict(item) for item in data if isinstance(item, dict)]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r})"
+
+
+class TicketRecord(Record):
+    # Fields read by the formatters, the mirror, the change feed and aggregation;
+    # agent_name and department_name are filled in by the directory
+    __slots__ = (
+        "id", "code", "subject", "status", "channel_type", "departmentid", "agentid",
+        "owner_contactid", "owner_name", "owner_email", "priority", "tags",
+        "date_created", "date_changed", "date_resolved", "agent_name", "department_name",
+    )
+
+
+class ContactRecord(Record):
+    __slots__ = (
+        "id", "firstname", "lastname", "email", "emails", "phone", "phones",
+        "company_id", "company_name", "city", "language", "type", "date_created", "date_changed",
+    )
@@ -0,0 +1,130 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from jsonschema import Draft7Validator
+from mcp.types import Tool
+
+from .deadline import deadline_after
+from .errors import ApiException, ToolInputError, ToolTimeoutError
+from .metrics import track_tool
+
+ToolFunction = Callable[[Dict[str, Any]], Awaitable[list]]
+
+
+class ToolHandler:
+    """A registered tool: its MCP definition, handler, compiled validator and limits."""
+
+    def __init__(self, tool: Tool, handler: ToolFunction,
+                 concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        self.tool = tool
+        self.handler = handler
+        self.validator = Draft7Validator(tool.inputSchema)
+        self.timeout = timeout
+        self.set_concurrency(concurrency)
+
+    def set_concurrency(self, concurrency: Optional[int]) -> None:
+        self.concurrency = concurrency
+        # One per partition (tenant), created on first call so it binds to the running event loop
+        self._semaphores: Dict[Optional[str], asyncio.Semaphore] = {}
+
+    def validate(self, params: Dict[str, Any]) -> None:
+        errors = sorted(self.validator.iter_errors(params), key=lambda e: list(e.absolute_path))
+        if errors:
+            details = "\n".join(
+                f"- {'.'.join(str(p) for p in error.absolute_path) or 'arguments'}: {error.message}"
+                for error in errors
+            )
+            raise ToolInputError(f"Invalid arguments for {self.tool.name}:\n{details}")
+
+    async def __call__(self, params: Dict[str, Any], partition: Optional[str] = None) -> list:
+        self.validate(params)
+        if not self.concurrency:
+            return await self._run(params)
+        semaphore = self._semaphores.get(partition)
+        if semaphore is None:
+            semaphore = self._semaphores[partition] = asyncio.Semaphore(self.concurrency)
+        async with semaphore:
+            return await self._run(params)
+
+    async def _run(self, params: Dict[str, Any]) -> list:
+        if not self.timeout:
+            return await self.handler(params)
+        try:
+            # The deadline lets API calls size their timeouts and skip retries that can't finish in time
+            with deadline_after(self.timeout):
+                return await asyncio.wait_for(self.handler(params), self.timeout)
+        except asyncio.TimeoutError:
+            raise ToolTimeoutError(f"Tool {self.tool.name} timed out after {self.timeout:g} seconds") from None
+
+
+class ToolRegistry:
+    """Maps tool names to handlers.
+
+    Argument validators are compiled once when a tool is registered, and every
+    call is validated before the handler runs. Per-tool concurrency limits,
+    timeouts and metrics are applied here, so handlers don't need to deal with them.
+    Concurrency limits apply per partition, so calls for one tenant don't take
+    the slots of another.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, ToolHandler] = {}
+        self._tools: Optional[List[Tool]] = None
+
+    def tool(self, name: str, description: str, input_schema: Dict[str, Any],
+             concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        def decorator(handler: ToolFunction) -> ToolFunction:
+            if name in self._handlers:
+                raise ValueError(f"Tool already registered: {name}")
+            tool = Tool(name=name, description=description, inputSchema=input_schema)
+            self._handlers[name] = ToolHandler(tool, handler, concurrency=concurrency, timeout=timeout)
+            self._tools = None
+            return handler
+        return decorator
+
+    def configure(self, concurrency: Optional[Dict[str, int]] = None,
+                  timeouts: Optional[Dict[str, float]] = None,
+                  default_timeout: Optional[float] = None) -> None:
+        """Override per-tool limits, e.g. from settings; unknown tool names are rejected."""
+        for name in list(concurrency or {}) + list(timeouts or {}):
+            if name not in self._handlers:
+                raise ValueError(f"Unknown tool in limits configuration: {name}")
+        for name, handler in self._handlers.items():
+            if concurrency and name in concurrency:
+                handler.set_concurrency(concurrency[name])
+            if timeouts and name in timeouts:
+                handler.timeout = timeouts[name]
+            elif default_timeout and handler.timeout is None:
+                handler.timeout = default_timeout
+
+    def add_argument(self, name: str, schema: Dict[str, Any]) -> None:
+        """Advertise an argument on every tool that the caller strips before the tool is called."""
+        for handler in self._handlers.values():
+            handler.tool.inputSchema.setdefault("properties", {})[name] = schema
+        self._tools = None
+
+    def get(self, name: str) -> Optional[ToolHandler]:
+        return self._handlers.get(name)
+
+    def tools(self) -> List[Tool]:
+        if self._tools is None:
+            self._tools = [handler.tool for handler in self._handlers.values()]
+        return self._tools
+
+    async def call(self, name: str, params: Dict[str, Any], partition: Optional[str] = None) -> list:
+        handler = self._handlers.get(name)
+        if handler is None:
+            raise ToolInputError(f"Unknown tool: {name}")
+        with track_tool(name) as tracked:
+            try:
+                return await handler(params, partition)
+            except ToolInputError:
+                tracked.outcome = "invalid"
+                raise
+            except ToolTimeoutError:
+                tracked.outcome = "timeout"
+                raise
+            except ApiException as e:
+                tracked.outcome = "api_error"
+                tracked.status = e.status
+                raise
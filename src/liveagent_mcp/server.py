@@ -1,685 +1,1649 @@
-import os
+import sys
 import asyncio
 import json
-from typing import Dict, List, Optional, Any
-from dotenv import load_dotenv
+import sqlite3
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any
 
-import liveagent_api
-from liveagent_api.rest import ApiException
 from mcp.server import Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from mcp.types import (
     Tool,
+    Resource,
     TextContent,
     CallToolRequest,
     ErrorData,
+    SubscribeRequest,
 )
 
-load_dotenv()
+from .aggregation import BUCKETS, DATE_FIELDS, DIMENSIONS, TicketAggregation
+from .changes import CHANGES_URI, change_columns
+from .cursors import StoredResult, make_cursor, parse_cursor
+from .errors import ApiException, ToolInputError, ToolTimeoutError
+from .formatting import (
+    TICKET_STATUS_CODES,
+    TICKET_FIELDS,
+    AGENT_FIELDS,
+    CONTACT_FIELDS,
+    DEPARTMENT_FIELDS,
+    COMPANY_FIELDS,
+    CHAT_FIELDS,
+    CALL_FIELDS,
+    output_schema,
+    output_options,
+    render,
+    render_one,
+    render_items,
+    join_items,
+    select_fields,
+    format_ticket,
+    format_contact,
+)
+from .instance import get_instance, get_tenants, use_tenant
+from .live import ACTIVE_CALL_STATUSES, CALLS_URI, CHATS_URI
+from .metrics import metrics, run_textfile_writer, start_http_server
+from .pagination import fetch_range, iter_pages, iter_unique_records
+from .registry import ToolRegistry
+from .settings import Settings, get_settings
+from .writes import write_key
 
-server = Server("liveagent")
+class LiveAgentServer(Server):
+    def get_capabilities(self, notification_options, experimental_capabilities):
+        # The low-level server never advertises resource subscriptions on its own
+        capabilities = super().get_capabilities(notification_options, experimental_capabilities)
+        if capabilities.resources is not None and SubscribeRequest in self.request_handlers:
+            capabilities.resources.subscribe = True
+        return capabilities
 
-BASE_URL = os.getenv("LIVEAGENT_BASE_URL", "").rstrip("/")
-API_KEY = os.getenv("LIVEAGENT_V3_API_KEY", "")
-TIMEOUT = int(os.getenv("LIVEAGENT_TIMEOUT", "30"))
+server = LiveAgentServer("liveagent")
 
-if not BASE_URL or not API_KEY:
-    raise ValueError("LIVEAGENT_BASE_URL and LIVEAGENT_V3_API_KEY must be set")
+# Every tool is registered below with its input schema; arguments are validated
+# against a validator compiled at import, before the handler is called
+tools = ToolRegistry()
 
-configuration = liveagent_api.Configuration()
-configuration.host = f"{BASE_URL}/api/v3"
-configuration.api_key["apikey"] = API_KEY
-configuration.request_timeout = TIMEOUT
+TICKET_STATUSES = ["new", "open", "answered", "resolved", "closed", "spam", "deleted", "chatting", "calling", "postponed", "init"]
+TICKET_PRIORITIES = ["low", "medium", "high", "urgent"]
 
-api_client = liveagent_api.ApiClient(configuration)
+METRICS_URI = "liveagent://metrics"
 
-tickets_api = liveagent_api.TicketsApi(api_client)
-agents_api = liveagent_api.AgentsApi(api_client)
-contacts_api = liveagent_api.ContactsApi(api_client)
-departments_api = liveagent_api.DepartmentsApi(api_client)
-messages_api = liveagent_api.MessagesApi(api_client)
-companies_api = liveagent_api.CompaniesApi(api_client)
-chats_api = liveagent_api.ChatsApi(api_client)
-calls_api = liveagent_api.CallsApi(api_client)
+# HTTP clients pick the tenant of a session with this header, tool calls with the tenant argument
+TENANT_HEADER = "x-liveagent-tenant"
 
 @server.list_tools()
 async def list_tools() -> List[Tool]:
+    return tools.tools()
+
+@server.list_resources()
+async def list_resources() -> List[Resource]:
     return [
-        Tool(
-            name="list_tickets",
-            description="List tickets with optional filters",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "status": {
-                        "type": "string",
-                        "description": "Filter by status: new (N), open (C), answered (A), resolved (R), closed (L), spam (B), deleted (X), chatting (T), calling (P), postponed (W), init (I)",
-                        "enum": ["new", "open", "answered", "resolved", "closed", "spam", "deleted", "chatting", "calling", "postponed", "init"]
-                    },
-                    "department_id": {
-                        "type": "string",
-                        "description": "Filter by department ID"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Filter by agent ID"
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Number of results to return (default: 20)",
-                        "default": 20
-                    },
-                    "offset": {
-                        "type": "integer",
-                        "description": "Offset for pagination (default: 0)",
-                        "default": 0
-                    }
-                }
-            }
+        Resource(
+            uri=METRICS_URI,
+            name="metrics",
+            description="Tool latency, LiveAgent API request and cache metrics in Prometheus text format",
+            mimeType="text/plain",
         ),
-        Tool(
-            name="get_ticket",
-            description="Get details of a specific ticket",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "ticket_id": {
-                        "type": "string",
-                        "description": "The ticket ID"
-                    }
-                },
-                "required": ["ticket_id"]
-            }
+        Resource(
+            uri=CHANGES_URI,
+            name="ticket changes",
+            description="Tickets created or changed since this session last read the resource; subscribe to be notified of changes",
+            mimeType="text/plain",
         ),
-        Tool(
-            name="create_ticket",
-            description="Create a new ticket",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "subject": {
-                        "type": "string",
-                        "description": "Ticket subject"
-                    },
-                    "message": {
-                        "type": "string",
-                        "description": "Initial message content"
-                    },
-                    "contact_email": {
-                        "type": "string",
-                        "description": "Contact email address"
-                    },
-                    "department_id": {
-                        "type": "string",
-                        "description": "Department ID (optional)"
-                    },
-                    "priority": {
-                        "type": "string",
-                        "description": "Priority level",
-                        "enum": ["low", "medium", "high", "urgent"]
-                    },
-                    "status": {
-                        "type": "string",
-                        "description": "Initial status (default: new)",
-                        "enum": ["new", "open", "answered"],
-                        "default": "new"
-                    }
-                },
-                "required": ["subject", "message", "contact_email"]
-            }
+        Resource(
+            uri=CHATS_URI,
+            name="chats",
+            description="Current chats; subscribe to be notified when chats start, end or change status or agent",
+            mimeType="text/plain",
         ),
-        Tool(
-            name="update_ticket",
-            description="Update a ticket's properties",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "ticket_id": {
-                        "type": "string",
-                        "description": "The ticket ID"
-                    },
-                    "status": {
-                        "type": "string",
-                        "description": "New status: new (N), open (C), answered (A), resolved (R), closed (L), spam (B), deleted (X), chatting (T), calling (P), postponed (W), init (I)",
-                        "enum": ["new", "open", "answered", "resolved", "closed", "spam", "deleted", "chatting", "calling", "postponed", "init"]
-                    },
-                    "priority": {
-                        "type": "string",
-                        "description": "New priority",
-                        "enum": ["low", "medium", "high", "urgent"]
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Assign to agent ID"
-                    },
-                    "department_id": {
-                        "type": "string",
-                        "description": "Move to department ID"
-                    }
-                },
-                "required": ["ticket_id"]
-            }
+        Resource(
+            uri=CALLS_URI,
+            name="calls",
+            description="Calls waiting, ringing or in progress; subscribe to be notified when they change",
+            mimeType="text/plain",
         ),
-        Tool(
-            name="add_ticket_message",
-            description="Add a message to an existing ticket",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "ticket_id": {
-                        "type": "string",
-                        "description": "The ticket ID"
-                    },
-                    "message": {
-                        "type": "string",
-                        "description": "Message content"
-                    },
-                    "is_public": {
-                        "type": "boolean",
-                        "description": "Whether the message is public (default: true)",
-                        "default": True
-                    }
-                },
-                "required": ["ticket_id", "message"]
-            }
-        ),
-        Tool(
-            name="list_agents",
-            description="List all agents",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "online_only": {
-                        "type": "boolean",
-                        "description": "Only show online agents",
-                        "default": False
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Number of results to return (default: 20)",
-                        "default": 20
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="get_agent",
-            description="Get details of a specific agent",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "agent_id": {
-                        "type": "string",
-                        "description": "The agent ID"
-                    }
-                },
-                "required": ["agent_id"]
-            }
-        ),
-        Tool(
-            name="list_contacts",
-            description="List contacts with optional search",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "search": {
-                        "type": "string",
-                        "description": "Search term for contacts"
-                    },
-                    "email": {
-                        "type": "string",
-                        "description": "Filter by email address"
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Number of results to return (default: 20)",
-                        "default": 20
-                    },
-                    "offset": {
-                        "type": "integer",
-                        "description": "Offset for pagination (default: 0)",
-                        "default": 0
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="get_contact",
-            description="Get details of a specific contact",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "contact_id": {
-                        "type": "string",
-                        "description": "The contact ID"
-                    }
-                },
-                "required": ["contact_id"]
+    ]
+
+@server.read_resource()
+async def read_resource(uri) -> List[ReadResourceContents]:
+    if str(uri) == METRICS_URI:
+        return [ReadResourceContents(content=metrics.render(), mime_type="text/plain")]
+    with use_tenant(session_tenant()):
+        return await read_tenant_resource(uri)
+
+async def read_tenant_resource(uri) -> List[ReadResourceContents]:
+    if str(uri) == CHANGES_URI:
+        blocks = await changed_tickets({})
+        return [ReadResourceContents(content="\n\n".join(b.text for b in blocks), mime_type="text/plain")]
+    if str(uri) in (CHATS_URI, CALLS_URI):
+        blocks = await (list_chats({}) if str(uri) == CHATS_URI else list_calls({}))
+        return [ReadResourceContents(content=blocks[0].text, mime_type="text/plain")]
+    raise ValueError(f"Unknown resource: {uri}")
+
+@server.subscribe_resource()
+async def subscribe_resource(uri) -> None:
+    with use_tenant(session_tenant()) as api:
+        await subscribe_tenant_resource(api, uri)
+
+async def subscribe_tenant_resource(api: Any, uri) -> None:
+    session = current_session()
+    if str(uri) == CHANGES_URI:
+        # Start the session's feed now, so the first notification reports changes made after subscribing
+        await api.change_feeds.get(session).ensure_started()
+        api.change_notifier.subscribers.add(session)
+    elif str(uri) in (CHATS_URI, CALLS_URI):
+        api.live_poller.subscribe(str(uri), session)
+    else:
+        raise ValueError(f"Resource does not support subscriptions: {uri}")
+
+@server.unsubscribe_resource()
+async def unsubscribe_resource(uri) -> None:
+    api = get_tenants().get(session_tenant())
+    if str(uri) == CHANGES_URI:
+        api.change_notifier.subscribers.discard(current_session())
+    elif str(uri) in (CHATS_URI, CALLS_URI):
+        api.live_poller.unsubscribe(str(uri), current_session())
+
+def current_session() -> Any:
+    # The client session of the request being handled, None outside of one
+    try:
+        return server.request_context.session
+    except LookupError:
+        return None
+
+def session_tenant() -> Optional[str]:
+    # Tenant requested by the HTTP client of the current request, if any
+    try:
+        request = server.request_context.request
+    except LookupError:
+        return None
+    headers = getattr(request, "headers", None)
+    return headers.get(TENANT_HEADER) if headers is not None else None
+
+def format_api_error(e: ApiException) -> str:
+    error_message = f"LiveAgent API Error: {e.status} - {e.reason}"
+    if e.body:
+        error_message += f"\nDetails: {e.body}"
+    return error_message
+
+def handle_api_error(e: ApiException) -> list:
+    return [TextContent(type="text", text=format_api_error(e))]
+
+def build_ticket_update(params: dict) -> Any:
+    import liveagent_api
+
+    update_data = liveagent_api.TicketUpdatable()
+
+    if "status" in params:
+        update_data.status = TICKET_STATUS_CODES.get(params["status"].lower(), 'N')
+    if "priority" in params:
+        update_data.priority = params["priority"]
+    if "agent_id" in params:
+        update_data.agentid = params["agent_id"]
+    if "department_id" in params:
+        update_data.departmentid = params["department_id"]
+    return update_data
+
+IDEMPOTENCY_KEY_SCHEMA = {
+    "type": "string",
+    "description": "Any unique string for this write; repeating the call with the same key returns the "
+                   "first result instead of writing again (default: a hash of the arguments for creates)"
+}
+
+async def idempotent_write(tool: str, params: dict, write, hash_content: bool) -> list:
+    # Repeats within LIVEAGENT_IDEMPOTENCY_TTL get the first result, e.g. when a
+    # client retries after a timeout while the first call went through
+    api = get_instance()
+    key = write_key(tool, params, hash_content and api.settings.idempotency_hash)
+    if key is None:
+        return await write()
+    result, repeated = await api.write_results.run(key, write)
+    if repeated:
+        return [TextContent(type="text", text="Repeated request, this is the result of the original one:")] + result
+    return result
+
+async def queue_ticket_update(api: Any, ticket_id: str, changes: dict) -> Any:
+    # Serialized per ticket; updates queued behind a running one go out as one merged request
+    async def apply(merged: dict) -> Any:
+        ticket = await api.tickets_api.update_ticket(ticket_id=ticket_id, ticket=build_ticket_update(merged))
+        api.response_cache.invalidate("ticket", ticket_id)
+        return ticket
+
+    return await api.ticket_writes.submit(ticket_id, changes, apply)
+
+async def run_batch(items: list, operation, concurrency: int) -> list:
+    # Runs operation(item) for every item with at most `concurrency` in flight and
+    # returns (item, result, error) tuples in input order; API errors don't stop the batch
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(item):
+        async with semaphore:
+            try:
+                return item, await operation(item), None
+            except ApiException as e:
+                return item, None, e
+
+    return await asyncio.gather(*(run_one(item) for item in items))
+
+async def report_progress(progress: float, total: Optional[float] = None) -> None:
+    # Only sent when the client asked for progress on the current request
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is not None:
+        await ctx.session.send_progress_notification(token, progress, total)
+
+def annotate_tickets(api: Any, tickets: Optional[list]) -> Optional[list]:
+    # Agent and department names from the directory next to their IDs, once it has loaded
+    if tickets and api.directory is not None and api.directory.is_loaded:
+        return api.directory.annotate(tickets)
+    return tickets
+
+PAGE_SIZE_SCHEMA = {
+    "type": "integer",
+    "description": "Results per response; the rest of a larger result is kept on the server and read with "
+                   "next_page (default: LIVEAGENT_RESULT_PAGE_SIZE, 50)",
+    "minimum": 1
+}
+
+def result_page(result_id: Optional[str], result: StoredResult, offset: int, title: str) -> list:
+    end = min(offset + result.page_size, len(result.items))
+    blocks = [TextContent(
+        type="text",
+        text=f"{title}, showing {offset + 1}-{end}:\n\n" + join_items(result.items[offset:end], result.fmt, result.selected)
+    )]
+    left = len(result.items) - end
+    if left and result_id is not None:
+        blocks.append(TextContent(
+            type="text", text=f"{left} more {result.noun}: call next_page with cursor {make_cursor(result_id, end)}"
+        ))
+    elif left:
+        blocks.append(TextContent(
+            type="text", text=f"The other {left} {result.noun} are too large to keep on the server (LIVEAGENT_RESULT_STORE_BYTES); "
+                              f"narrow the filters or page with offset"
+        ))
+    return blocks
+
+def page_items(api: Any, items: List[str], params: dict, fmt: str, selected, noun: str, title: str) -> Optional[list]:
+    # Results longer than a page are kept as rendered, so next_page serves the rest
+    # from memory, consistent with the first page; None if it all fits one page
+    page_size = params.get("page_size", api.settings.result_page_size)
+    if not page_size or len(items) <= page_size:
+        return None
+    result = StoredResult(items, fmt, selected, noun, page_size)
+    return result_page(api.result_store.put(result), result, 0, title)
+
+def page_results(api: Any, records: list, params: dict, fmt: str, selected, separator: str,
+                 noun: str, title: str) -> Optional[list]:
+    page_size = params.get("page_size", api.settings.result_page_size)
+    if not page_size or len(records) <= page_size:
+        return None
+    return page_items(api, render_items(records, fmt, selected, separator), params, fmt, selected, noun, title)
+
+async def fetch_all_pages(api: Any, fetch_page, params: dict, spec, separator: str, noun: str,
+                          prepare=None) -> list:
+    # Pages are fetched concurrently but formatted one at a time in order, so only
+    # the text of each page is kept and the client sees progress as pages arrive
+    settings = api.settings
+    fmt, selected = output_options(params, spec)
+    max_items = params.get("max_items", settings.fetch_all_max_items)
+    paged = bool(params.get("page_size", settings.result_page_size))
+    blocks = []
+    items: List[str] = []
+    count = 0
+    async for records in iter_unique_records(
+        fetch_page, settings.page_size, max_items=max_items, concurrency=settings.page_concurrency
+    ):
+        count += len(records)
+        if prepare is not None:
+            records = prepare(records)
+        if paged:
+            # One string per record, so the result can be cut into pages later
+            items.extend(render_items(records, fmt, selected, separator))
+        else:
+            blocks.append(TextContent(
+                type="text",
+                text=render(records, fmt, selected, separator, header=not blocks)
+            ))
+        await report_progress(count, max_items)
+
+    if not count:
+        return [TextContent(type="text", text=f"No {noun} found.")]
+    if paged:
+        blocks = page_items(api, items, params, fmt, selected, noun, f"Found {count} {noun}")
+        if blocks is not None:
+            return blocks
+        blocks = [TextContent(type="text", text=join_items(items, fmt, selected))]
+    return [TextContent(type="text", text=f"Found {count} {noun}:")] + blocks
+
+@tools.tool(
+    name="list_tickets",
+    description="List tickets with optional filters",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "status": {
+                "type": "string",
+                "description": "Filter by status: new (N), open (C), answered (A), resolved (R), closed (L), spam (B), deleted (X), chatting (T), calling (P), postponed (W), init (I)",
+                "enum": TICKET_STATUSES
+            },
+            "department_id": {
+                "type": "string",
+                "description": "Filter by department ID"
+            },
+            "agent_id": {
+                "type": "string",
+                "description": "Filter by agent ID"
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Number of results to return (default: 20)",
+                "default": 20,
+                "minimum": 1
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Offset for pagination (default: 0)",
+                "default": 0,
+                "minimum": 0
+            },
+            "fetch_all": {
+                "type": "boolean",
+                "description": "Page through all matching tickets instead of returning a single page (default: false)",
+                "default": False
+            },
+            "max_items": {
+                "type": "integer",
+                "description": "Maximum number of tickets to return with fetch_all (default: LIVEAGENT_FETCH_ALL_MAX_ITEMS, 1000)",
+                "minimum": 1
+            },
+            "page_size": PAGE_SIZE_SCHEMA,
+            **output_schema(TICKET_FIELDS)
+        }
+    }
+)
+async def list_tickets(params: dict) -> list:
+    api = get_instance()
+
+    # Build filters for the API
+    filters = {}
+    if params.get("status"):
+        filters["status"] = TICKET_STATUS_CODES.get(params["status"].lower(), 'N')
+    if params.get("department_id"):
+        filters["departmentid"] = params["department_id"]
+    if params.get("agent_id"):
+        filters["agentid"] = params["agent_id"]
+
+    kwargs = {
+        "per_page": params.get("limit", 20),
+        "_from": params.get("offset", 0)
+    }
+    if filters:
+        kwargs["filters"] = json.dumps(filters)
+
+    if params.get("fetch_all"):
+        del kwargs["_from"]
+        return await fetch_all_pages(
+            api,
+            lambda page: api.tickets_api.get_tickets_list(**dict(kwargs, per_page=api.settings.page_size, page=page)),
+            params, TICKET_FIELDS, "-" * 50, "tickets",
+            prepare=lambda records: annotate_tickets(api, records)
+        )
+
+    fmt, selected = output_options(params, TICKET_FIELDS)
+    tickets = await api.tickets_api.get_tickets_list(
+        **kwargs
+    )
+
+    if not tickets:
+        return [TextContent(type="text", text="No tickets found.")]
+
+    tickets = annotate_tickets(api, tickets)
+    paged = page_results(api, tickets, params, fmt, selected, "-" * 50, "tickets", f"Found {len(tickets)} tickets")
+    if paged is not None:
+        return paged
+    result = f"Found {len(tickets)} tickets:\n\n" + render(tickets, fmt, selected, "-" * 50)
+
+    return [TextContent(type="text", text=result)]
+
+@tools.tool(
+    name="get_ticket",
+    description="Get details of a specific ticket",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "ticket_id": {
+                "type": "string",
+                "description": "The ticket ID"
+            },
+            **output_schema(TICKET_FIELDS)
+        },
+        "required": ["ticket_id"]
+    }
+)
+async def get_ticket(params: dict) -> list:
+    api = get_instance()
+    fmt, selected = output_options(params, TICKET_FIELDS)
+    ticket = await api.response_cache.get_or_fetch(
+        "ticket", params["ticket_id"],
+        lambda: api.tickets_api.get_ticket(ticket_id=params["ticket_id"])
+    )
+    ticket = annotate_tickets(api, [ticket])[0]
+
+    result = render_one(ticket, fmt, selected)
+
+    if hasattr(ticket, 'messages') and ticket.messages:
+        result += f"\n\nMessages ({len(ticket.messages)}):\n"
+        for msg in ticket.messages[-5:]:
+            result += f"\n[{msg.date_created}] {msg.from_name}: {msg.message[:200]}..."
+
+    return [TextContent(type="text", text=result)]
+
+@tools.tool(
+    name="get_ticket_messages",
+    description="Read a ticket's conversation page by page, oldest first",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "ticket_id": {
+                "type": "string",
+                "description": "The ticket ID"
+            },
+            "cursor": {
+                "type": "string",
+                "description": "Cursor returned by a previous call to continue reading"
+            },
+            "max_chars": {
+                "type": "integer",
+                "description": "Approximate maximum number of message characters to return (default: 8000)",
+                "default": 8000,
+                "minimum": 1
             }
-        ),
-        Tool(
-            name="create_contact",
-            description="Create a new contact",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "email": {
-                        "type": "string",
-                        "description": "Contact email address"
-                    },
-                    "firstname": {
-                        "type": "string",
-                        "description": "First name"
-                    },
-                    "lastname": {
-                        "type": "string",
-                        "description": "Last name"
-                    },
-                    "phone": {
-                        "type": "string",
-                        "description": "Phone number"
-                    },
-                    "company_id": {
-                        "type": "string",
-                        "description": "Company ID (optional)"
-                    },
-                    "gender": {
-                        "type": "string",
-                        "description": "Gender: male (M), female (F), other (O), unspecified (X)",
-                        "enum": ["male", "female", "other", "unspecified"]
-                    },
-                    "city": {
-                        "type": "string",
-                        "description": "City"
-                    },
-                    "language": {
-                        "type": "string",
-                        "description": "Language code (e.g., 'en', 'es', 'fr')"
+        },
+        "required": ["ticket_id"]
+    }
+)
+async def get_ticket_messages(params: dict) -> list:
+    api = get_instance()
+    messages, next_cursor = await api.message_reader.read(
+        params["ticket_id"], params.get("cursor"), params.get("max_chars", 8000)
+    )
+
+    if not messages:
+        return [TextContent(type="text", text="No messages found.")]
+
+    result = f"{len(messages)} messages:\n"
+    for msg in messages:
+        result += f"\n[{msg['date']}] {msg['author']} ({msg['type']}): {msg['text']}\n"
+    if next_cursor:
+        result += f"\nMore messages available, continue with cursor: {next_cursor}"
+
+    return [TextContent(type="text", text=result)]
+
+@tools.tool(
+    name="create_ticket",
+    description="Create a new ticket",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "subject": {
+                "type": "string",
+                "description": "Ticket subject"
+            },
+            "message": {
+                "type": "string",
+                "description": "Initial message content"
+            },
+            "contact_email": {
+                "type": "string",
+                "description": "Contact email address"
+            },
+            "department_id": {
+                "type": "string",
+                "description": "Department ID (optional)"
+            },
+            "priority": {
+                "type": "string",
+                "description": "Priority level",
+                "enum": TICKET_PRIORITIES
+            },
+            "status": {
+                "type": "string",
+                "description": "Initial status (default: new)",
+                "enum": ["new", "open", "answered"],
+                "default": "new"
+            },
+            "idempotency_key": IDEMPOTENCY_KEY_SCHEMA
+        },
+        "required": ["subject", "message", "contact_email"]
+    }
+)
+async def create_ticket(params: dict) -> list:
+    return await idempotent_write("create_ticket", params, lambda: write_ticket(params), hash_content=True)
+
+async def write_ticket(params: dict) -> list:
+    import liveagent_api
+
+    api = get_instance()
+
+    # Create a ticket object with the required fields
+    # Note: useridentifier is required but we'll use the email as identifier
+    ticket_data = liveagent_api.TicketListItem(
+        useridentifier=params["contact_email"],
+        subject=params["subject"],
+        message=params["message"],
+        recipient=params["contact_email"],
+        departmentid=params.get("department_id", "default")
+    )
+
+    # Set status with proper code
+    if params.get("status"):
+        ticket_data.status = TICKET_STATUS_CODES.get(params["status"].lower(), 'N')
+    else:
+        ticket_data.status = "N"  # Default to new
+
+    # Set optional fields with their meanings:
+    # do_not_send_mail: Y=yes (don't send), N=no (send email)
+    ticket_data.do_not_send_mail = "N"
+    # use_template: Y=yes (use email template), N=no
+    ticket_data.use_template = "Y"
+    # is_html_message: Y=yes (HTML format), N=no (plain text)
+    ticket_data.is_html_message = "N"
+
+    if "priority" in params:
+        ticket_data.priority = params["priority"]
+
+    ticket = await api.tickets_api.create_ticket(
+        ticket=ticket_data
+    )
+    api.response_cache.invalidate("ticket", ticket.id)
+    ticket = annotate_tickets(api, [ticket])[0]
+
+    return [TextContent(type="text", text=f"Ticket created successfully!\n\n{format_ticket(ticket)}")]
+
+@tools.tool(
+    name="update_ticket",
+    description="Update a ticket's properties",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "ticket_id": {
+                "type": "string",
+                "description": "The ticket ID"
+            },
+            "status": {
+                "type": "string",
+                "description": "New status: new (N), open (C), answered (A), resolved (R), closed (L), spam (B), deleted (X), chatting (T), calling (P), postponed (W), init (I)",
+                "enum": TICKET_STATUSES
+            },
+            "priority": {
+                "type": "string",
+                "description": "New priority",
+                "enum": TICKET_PRIORITIES
+            },
+            "agent_id": {
+                "type": "string",
+                "description": "Assign to agent ID"
+            },
+            "department_id": {
+                "type": "string",
+                "description": "Move to department ID"
+            },
+            "idempotency_key": IDEMPOTENCY_KEY_SCHEMA
+        },
+        "required": ["ticket_id"]
+    }
+)
+async def update_ticket(params: dict) -> list:
+    return await idempotent_write("update_ticket", params, lambda: write_ticket_update(params), hash_content=False)
+
+async def write_ticket_update(params: dict) -> list:
+    api = get_instance()
+    changes = {k: params[k] for k in ("status", "priority", "agent_id", "department_id") if k in params}
+    ticket = await queue_ticket_update(api, params["ticket_id"], changes)
+    ticket = annotate_tickets(api, [ticket])[0]
+
+    return [TextContent(type="text", text=f"Ticket updated successfully!\n\n{format_ticket(ticket)}")]
+
+@tools.tool(
+    name="get_tickets",
+    description="Get details of several tickets in one call",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "ticket_ids": {
+                "type": "array",
+                "description": "The ticket IDs",
+                "items": {"type": "string"}
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum number of tickets fetched in parallel (default: LIVEAGENT_BATCH_CONCURRENCY, 10)",
+                "minimum": 1
+            },
+            **output_schema(TICKET_FIELDS)
+        },
+        "required": ["ticket_ids"]
+    }
+)
+async def get_tickets(params: dict) -> list:
+    api = get_instance()
+    fmt, selected = output_options(params, TICKET_FIELDS)
+    # Keep the first occurrence of every ID so repeated IDs cost one lookup
+    ticket_ids = list(dict.fromkeys(params["ticket_ids"]))
+
+    async def fetch(ticket_id):
+        return await api.response_cache.get_or_fetch(
+            "ticket", ticket_id,
+            lambda: api.tickets_api.get_ticket(ticket_id=ticket_id)
+        )
+
+    results = await run_batch(
+        ticket_ids, fetch, params.get("concurrency", api.settings.batch_concurrency)
+    )
+
+    found = [ticket for _, ticket, error in results if error is None]
+    found = annotate_tickets(api, found)
+    result = f"Found {len(found)} of {len(ticket_ids)} tickets:\n\n" + render(found, fmt, selected, "-" * 50)
+    failed = [(ticket_id, error) for ticket_id, _, error in results if error is not None]
+    if failed:
+        result += "\n\nFailed:"
+        for ticket_id, error in failed:
+            result += f"\n- {ticket_id}: {format_api_error(error)}"
+
+    return [TextContent(type="text", text=result)]
+
+@tools.tool(
+    name="bulk_update_tickets",
+    description="Update the properties of several tickets in one call",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "updates": {
+                "type": "array",
+                "description": "One entry per ticket, with the same fields as update_ticket",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "ticket_id": {
+                            "type": "string",
+                            "description": "The ticket ID"
+                        },
+                        "status": {
+                            "type": "string",
+                            "description": "New status",
+                            "enum": TICKET_STATUSES
+                        },
+                        "priority": {
+                            "type": "string",
+                            "description": "New priority",
+                            "enum": TICKET_PRIORITIES
+                        },
+                        "agent_id": {
+                            "type": "string",
+                            "description": "Assign to agent ID"
+                        },
+                        "department_id": {
+                            "type": "string",
+                            "description": "Move to department ID"
+                        }
                     },
-                    "note": {
-                        "type": "string",
-                        "description": "Note about the contact"
-                    }
-                },
-                "required": ["email"]
-            }
-        ),
-        Tool(
-            name="list_departments",
-            description="List all departments",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "limit": {
-                        "type": "integer",
-                        "description": "Number of results to return (default: 20)",
-                        "default": 20
-                    }
+                    "required": ["ticket_id"]
                 }
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum number of tickets updated in parallel (default: LIVEAGENT_BATCH_CONCURRENCY, 10)",
+                "minimum": 1
             }
-        ),
-        Tool(
-            name="search_tickets",
-            description="Search tickets by query",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search query"
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Number of results to return (default: 20)",
-                        "default": 20
-                    }
-                },
-                "required": ["query"]
+        },
+        "required": ["updates"]
+    }
+)
+async def bulk_update_tickets(params: dict) -> list:
+    api = get_instance()
+    updates = params["updates"]
+
+    async def update(item):
+        changes = {k: item[k] for k in ("status", "priority", "agent_id", "department_id") if k in item}
+        return await queue_ticket_update(api, item["ticket_id"], changes)
+
+    results = await run_batch(
+        updates, update, params.get("concurrency", api.settings.batch_concurrency)
+    )
+
+    updated = [item["ticket_id"] for item, _, error in results if error is None]
+    result = f"Updated {len(updated)} of {len(updates)} tickets."
+    if updated:
+        result += f"\n\nUpdated: {', '.join(updated)}"
+    failed = [(item, error) for item, _, error in results if error is not None]
+    if failed:
+        result += "\n\nFailed:"
+        for item, error in failed:
+            result += f"\n- {item['ticket_id']}: {format_api_error(error)}"
+
+    return [TextContent(type="text", text=result)]
+
+@tools.tool(
+    name="add_ticket_message",
+    description="Add a message to an existing ticket",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "ticket_id": {
+                "type": "string",
+                "description": "The ticket ID"
+            },
+            "message": {
+                "type": "string",
+                "description": "Message content"
+            },
+            "is_public": {
+                "type": "boolean",
+                "description": "Whether the message is public (default: true)",
+                "default": True
             }
+        },
+        "required": ["ticket_id", "message"]
+    }
+)
+async def add_ticket_message(params: dict) -> list:
+    # Note: The LiveAgent Python SDK doesn't have a direct method to add messages to tickets
+    # This would require using the raw API or updating the ticket with a new message
+    return [TextContent(type="text", text="Adding messages to existing tickets is not supported by the LiveAgent Python SDK. Please create a new ticket or use the LiveAgent web interface.")]
+
+@tools.tool(
+    name="list_agents",
+    description="List all agents",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "online_only": {
+                "type": "boolean",
+                "description": "Only show online agents",
+                "default": False
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Number of results to return (default: 20)",
+                "default": 20,
+                "minimum": 1
+            },
+            **output_schema(AGENT_FIELDS)
+        }
+    }
+)
+async def list_agents(params: dict) -> list:
+    api = get_instance()
+    fmt, selected = output_options(params, AGENT_FIELDS)
+    agents = await api.response_cache.get_or_fetch(
+        "agents", params.get("limit", 20),
+        lambda: api.agents_api.get_agents(per_page=params.get("limit", 20))
+    )
+
+    if params.get("online_only"):
+        agents = [a for a in agents if getattr(a, 'is_online', False)]
+
+    if not agents:
+        return [TextContent(type="text", text="No agents found.")]
+
+    result = f"Found {len(agents)} agents:\n\n" + render(agents, fmt, selected, "-" * 30)
+
+    return [TextContent(type="text", text=result)]
+
+@tools.tool(
+    name="get_agent",
+    description="Get details of a specific agent",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "agent_id": {
+                "type": "string",
+                "description": "The agent ID"
+            },
+            **output_schema(AGENT_FIELDS)
+        },
+        "required": ["agent_id"]
+    }
+)
+async def get_agent(params: dict) -> list:
+    api = get_instance()
+    fmt, selected = output_options(params, AGENT_FIELDS)
+    agent = api.directory.get_agent(params["agent_id"]) if api.directory is not None else None
+    if agent is None:
+        agent = await api.response_cache.get_or_fetch(
+            "agent", params["agent_id"],
+            lambda: api.agents_api.get_agent(agent_id=params["agent_id"])
         )
-    ]
 
-def handle_api_error(e: ApiException) -> list:
-    error_message = f"LiveAgent API Error: {e.status} - {e.reason}"
-    if e.body:
-        error_message += f"\nDetails: {e.body}"
-    
-    return [TextContent(type="text", text=error_message)]
-
-def format_ticket(ticket: Any) -> str:
-    status_map = {
-        'I': 'Init', 'N': 'New', 'T': 'Chatting', 'P': 'Calling', 
-        'R': 'Resolved', 'X': 'Deleted', 'B': 'Spam', 'A': 'Answered', 
-        'C': 'Open', 'W': 'Postponed', 'L': 'Closed'
+    return [TextContent(type="text", text=render_one(agent, fmt, selected))]
+
+def render_contacts(api: Any, contacts: list, params: dict) -> list:
+    if not contacts:
+        return [TextContent(type="text", text="No contacts found.")]
+
+    fmt, selected = output_options(params, CONTACT_FIELDS)
+    paged = page_results(api, contacts, params, fmt, selected, "-" * 30, "contacts", f"Found {len(contacts)} contacts")
+    if paged is not None:
+        return paged
+    result = f"Found {len(contacts)} contacts:\n\n" + render(contacts, fmt, selected, "-" * 30)
+
+    return [TextContent(type="text", text=result)]
+
+async def find_contacts_by_email(api, email: str) -> list:
+    # The local index answers while it is fresh, otherwise one exact-email query
+    if api.contact_index is not None and api.contact_index.is_fresh():
+        return api.contact_index.find_by_email(email)
+    return await api.contacts_api.get_contacts_list(
+        filters=json.dumps([["emails", "=", email]]), per_page=5, page=1
+    ) or []
+
+@tools.tool(
+    name="list_contacts",
+    description="List contacts with optional search",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "search": {
+                "type": "string",
+                "description": "Search term for contacts"
+            },
+            "email": {
+                "type": "string",
+                "description": "Filter by email address"
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Number of results to return (default: 20)",
+                "default": 20,
+                "minimum": 1
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Offset for pagination (default: 0)",
+                "default": 0,
+                "minimum": 0
+            },
+            "fetch_all": {
+                "type": "boolean",
+                "description": "Page through all matching contacts instead of returning a single page (default: false)",
+                "default": False
+            },
+            "max_items": {
+                "type": "integer",
+                "description": "Maximum number of contacts to return with fetch_all (default: LIVEAGENT_FETCH_ALL_MAX_ITEMS, 1000)",
+                "minimum": 1
+            },
+            "page_size": PAGE_SIZE_SCHEMA,
+            **output_schema(CONTACT_FIELDS)
+        }
     }
-    channel_map = {
-        'E': 'Email', 'B': 'Contact Button', 'M': 'Contact Form', 
-        'I': 'Invitation', 'C': 'Call', 'W': 'Call Button', 
-        'F': 'Facebook', 'A': 'Facebook Message', 'T': 'Twitter', 
-        'Q': 'Forum', 'S': 'Suggestion'
+)
+async def list_contacts(params: dict) -> list:
+    api = get_instance()
+    limit = params.get("limit", 20)
+    offset = params.get("offset", 0)
+
+    index = api.contact_index
+    if (params.get("search") or params.get("email")) and index is not None and index.is_fresh():
+        # Matches on first/last name, company or email words from the local index, best first
+        contacts = index.search(params.get("search"), params.get("email"))
+        if params.get("fetch_all"):
+            contacts = contacts[:params.get("max_items", api.settings.fetch_all_max_items)]
+        else:
+            contacts = contacts[offset:offset + limit]
+        return render_contacts(api, contacts, params)
+
+    # For contacts, we might need to use advanced filter format
+    filters = []
+    if params.get("search"):
+        # Search in name fields
+        filters.append(["firstname", "LIKE", f"%{params['search']}%"])
+    if params.get("email"):
+        # Search by exact email
+        filters.append(["emails", "=", params["email"]])
+
+    kwargs = {}
+    if filters:
+        kwargs["filters"] = json.dumps(filters)
+
+    if params.get("fetch_all"):
+        return await fetch_all_pages(
+            api,
+            lambda page: api.contacts_api.get_contacts_list(**kwargs, per_page=api.settings.page_size, page=page),
+            params, CONTACT_FIELDS, "-" * 30, "contacts"
+        )
+
+    contacts = await fetch_range(
+        lambda page: api.contacts_api.get_contacts_list(**kwargs, per_page=limit, page=page),
+        offset, limit
+    )
+    return render_contacts(api, contacts, params)
+
+@tools.tool(
+    name="get_contact",
+    description="Get details of a specific contact",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "contact_id": {
+                "type": "string",
+                "description": "The contact ID"
+            },
+            **output_schema(CONTACT_FIELDS)
+        },
+        "required": ["contact_id"]
     }
-    return f"""Ticket ID: {ticket.id}
-Code: {ticket.code}
-Subject: {ticket.subject}
-Status: {status_map.get(ticket.status, ticket.status)}
-Channel: {channel_map.get(ticket.channel_type, ticket.channel_type)}
-Department: {ticket.departmentid}
-Agent: {ticket.agentid or 'Unassigned'}
-Customer: {ticket.owner_name} ({ticket.owner_email})
-Created: {ticket.date_created}
-Last Updated: {getattr(ticket, 'date_changed', 'N/A')}"""
-
-def format_agent(agent: Any) -> str:
-    return f"""Agent ID: {agent.id}
-Name: {agent.firstname} {agent.lastname}
-Email: {agent.email}
-Status: {'Online' if getattr(agent, 'is_online', False) else 'Offline'}
-Role: {getattr(agent, 'role', 'Agent')}"""
-
-def format_contact(contact: Any) -> str:
-    return f"""Contact ID: {contact.id}
-Name: {getattr(contact, 'firstname', '')} {getattr(contact, 'lastname', '')}
-Email: {contact.email}
-Phone: {getattr(contact, 'phone', 'N/A')}
-Company: {getattr(contact, 'company_name', 'N/A')}"""
-
-@server.call_tool()
-async def handle_call_tool(name: str, arguments: dict) -> list:
-    try:
-        tool_name = name
-        params = arguments or {}
-        
-        if tool_name == "list_tickets":
-            # Build filters for the API
-            filters = {}
-            if params.get("status"):
-                status_map = {
-                    'init': 'I', 'new': 'N', 'chatting': 'T', 'calling': 'P',
-                    'resolved': 'R', 'deleted': 'X', 'spam': 'B', 'answered': 'A',
-                    'open': 'C', 'postponed': 'W', 'closed': 'L'
-                }
-                filters["status"] = status_map.get(params["status"].lower(), 'N')
-            if params.get("department_id"):
-                filters["departmentid"] = params["department_id"]
-            if params.get("agent_id"):
-                filters["agentid"] = params["agent_id"]
-            
-            kwargs = {
-                "per_page": params.get("limit", 20),
-                "_from": params.get("offset", 0)
+)
+async def get_contact(params: dict) -> list:
+    api = get_instance()
+    fmt, selected = output_options(params, CONTACT_FIELDS)
+    contact = await api.response_cache.get_or_fetch(
+        "contact", params["contact_id"],
+        lambda: api.contacts_api.get_specific_contact(contact_id=params["contact_id"])
+    )
+
+    return [TextContent(type="text", text=render_one(contact, fmt, selected))]
+
+@tools.tool(
+    name="create_contact",
+    description="Create a new contact, unless one with the same email already exists",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "email": {
+                "type": "string",
+                "description": "Contact email address"
+            },
+            "firstname": {
+                "type": "string",
+                "description": "First name"
+            },
+            "lastname": {
+                "type": "string",
+                "description": "Last name"
+            },
+            "phone": {
+                "type": "string",
+                "description": "Phone number"
+            },
+            "company_id": {
+                "type": "string",
+                "description": "Company ID (optional)"
+            },
+            "gender": {
+                "type": "string",
+                "description": "Gender: male (M), female (F), other (O), unspecified (X)",
+                "enum": ["male", "female", "other", "unspecified"]
+            },
+            "city": {
+                "type": "string",
+                "description": "City"
+            },
+            "language": {
+                "type": "string",
+                "description": "Language code (e.g., 'en', 'es', 'fr')"
+            },
+            "note": {
+                "type": "string",
+                "description": "Note about the contact"
+            },
+            "allow_duplicate": {
+                "type": "boolean",
+                "description": "Create the contact even if one with this email already exists (default: false)",
+                "default": False
+            },
+            "idempotency_key": IDEMPOTENCY_KEY_SCHEMA
+        },
+        "required": ["email"]
+    }
+)
+async def create_contact(params: dict) -> list:
+    return await idempotent_write("create_contact", params, lambda: write_contact(params), hash_content=True)
+
+async def write_contact(params: dict) -> list:
+    import liveagent_api
+
+    api = get_instance()
+
+    if not params.get("allow_duplicate"):
+        existing = await find_contacts_by_email(api, params["email"])
+        if existing:
+            return [TextContent(
+                type="text",
+                text=f"A contact with email {params['email']} already exists (pass allow_duplicate to create "
+                     f"another one):\n\n{format_contact(existing[0])}"
+            )]
+
+    # Create contact object - note that email should be in a list
+    contact_data = liveagent_api.ContactRequest()
+
+    # Email should be provided as a list
+    contact_data.emails = [params["email"]]
+
+    if "firstname" in params:
+        contact_data.firstname = params["firstname"]
+    if "lastname" in params:
+        contact_data.lastname = params["lastname"]
+    if "phone" in params:
+        # Phone should be provided as a list
+        contact_data.phones = [params["phone"]]
+    if "company_id" in params:
+        contact_data.company_id = params["company_id"]
+    if "gender" in params:
+        # Map gender to proper code
+        gender_map = {
+            'male': 'M', 'female': 'F', 'other': 'O', 'unspecified': 'X'
+        }
+        contact_data.gender = gender_map.get(params["gender"].lower(), 'X')
+    if "city" in params:
+        contact_data.city = params["city"]
+    if "language" in params:
+        contact_data.language = params["language"]
+    if "note" in params:
+        contact_data.note = params["note"]
+
+    contact = await api.contacts_api.create_contact(
+        contact=contact_data
+    )
+    api.response_cache.invalidate("contact", contact.id)
+    if api.contact_index is not None:
+        api.contact_index.upsert([contact])
+
+    return [TextContent(type="text", text=f"Contact created successfully!\n\n{format_contact(contact)}")]
+
+CUSTOMER_TICKET_FIELDS = select_fields(TICKET_FIELDS, ["id", "code", "subject", "status", "agent", "updated"])
+
+@tools.tool(
+    name="customer_360",
+    description="Get a customer's contact details, company and recent tickets in one call. "
+                "The lookups run concurrently.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "email": {
+                "type": "string",
+                "description": "Customer email address"
+            },
+            "contact_id": {
+                "type": "string",
+                "description": "Contact ID, instead of email"
+            },
+            "ticket_limit": {
+                "type": "integer",
+                "description": "Number of most recently changed tickets to list (default: 10)",
+                "default": 10,
+                "minimum": 1
             }
-            if filters:
-                kwargs["filters"] = json.dumps(filters)
-            
-            tickets = await asyncio.to_thread(
-                tickets_api.get_tickets_list,
-                **kwargs
-            )
-            
-            if not tickets:
-                return [TextContent(type="text", text="No tickets found.")]
-            
-            result = f"Found {len(tickets)} tickets:\n\n"
-            for ticket in tickets:
-                result += format_ticket(ticket) + "\n" + "-" * 50 + "\n"
-            
-            return [TextContent(type="text", text=result)]
-        
-        elif tool_name == "get_ticket":
-            ticket = await asyncio.to_thread(
-                tickets_api.get_ticket,
-                ticket_id=params["ticket_id"]
-            )
-            
-            result = format_ticket(ticket)
-            
-            if hasattr(ticket, 'messages') and ticket.messages:
-                result += f"\n\nMessages ({len(ticket.messages)}):\n"
-                for msg in ticket.messages[-5:]:
-                    result += f"\n[{msg.date_created}] {msg.from_name}: {msg.message[:200]}..."
-            
-            return [TextContent(type="text", text=result)]
-        
-        elif tool_name == "create_ticket":
-            # Create a ticket object with the required fields
-            # Note: useridentifier is required but we'll use the email as identifier
-            ticket_data = liveagent_api.TicketListItem(
-                useridentifier=params["contact_email"],
-                subject=params["subject"],
-                message=params["message"],
-                recipient=params["contact_email"],
-                departmentid=params.get("department_id", "default")
-            )
-            
-            # Set status with proper code
-            if params.get("status"):
-                status_map = {
-                    'init': 'I', 'new': 'N', 'chatting': 'T', 'calling': 'P',
-                    'resolved': 'R', 'deleted': 'X', 'spam': 'B', 'answered': 'A',
-                    'open': 'C', 'postponed': 'W', 'closed': 'L'
-                }
-                ticket_data.status = status_map.get(params["status"].lower(), 'N')
-            else:
-                ticket_data.status = "N"  # Default to new
-            
-            # Set optional fields with their meanings:
-            # do_not_send_mail: Y=yes (don't send), N=no (send email)
-            ticket_data.do_not_send_mail = "N"
-            # use_template: Y=yes (use email template), N=no
-            ticket_data.use_template = "Y"
-            # is_html_message: Y=yes (HTML format), N=no (plain text)
-            ticket_data.is_html_message = "N"
-            
-            if "priority" in params:
-                ticket_data.priority = params["priority"]
-            
-            ticket = await asyncio.to_thread(
-                tickets_api.create_ticket,
-                ticket=ticket_data
-            )
-            
-            return [TextContent(type="text", text=f"Ticket created successfully!\n\n{format_ticket(ticket)}")]
-        
-        elif tool_name == "update_ticket":
-            # Create update object
-            update_data = liveagent_api.TicketUpdatable()
-            
-            if "status" in params:
-                status_map = {
-                    'init': 'I', 'new': 'N', 'chatting': 'T', 'calling': 'P',
-                    'resolved': 'R', 'deleted': 'X', 'spam': 'B', 'answered': 'A',
-                    'open': 'C', 'postponed': 'W', 'closed': 'L'
-                }
-                update_data.status = status_map.get(params["status"].lower(), 'N')
-            if "priority" in params:
-                update_data.priority = params["priority"]
-            if "agent_id" in params:
-                update_data.agentid = params["agent_id"]
-            if "department_id" in params:
-                update_data.departmentid = params["department_id"]
-            
-            ticket = await asyncio.to_thread(
-                tickets_api.update_ticket,
-                ticket_id=params["ticket_id"],
-                ticket=update_data
-            )
-            
-            return [TextContent(type="text", text=f"Ticket updated successfully!\n\n{format_ticket(ticket)}")]
-        
-        elif tool_name == "add_ticket_message":
-            # Note: The LiveAgent Python SDK doesn't have a direct method to add messages to tickets
-            # This would require using the raw API or updating the ticket with a new message
-            return [TextContent(type="text", text="Adding messages to existing tickets is not supported by the LiveAgent Python SDK. Please create a new ticket or use the LiveAgent web interface.")]
-        
-        elif tool_name == "list_agents":
-            agents = await asyncio.to_thread(
-                agents_api.get_agents,
-                per_page=params.get("limit", 20)
-            )
-            
-            if params.get("online_only"):
-                agents = [a for a in agents if getattr(a, 'is_online', False)]
-            
-            if not agents:
-                return [TextContent(type="text", text="No agents found.")]
-            
-            result = f"Found {len(agents)} agents:\n\n"
-            for agent in agents:
-                result += format_agent(agent) + "\n" + "-" * 30 + "\n"
-            
-            return [TextContent(type="text", text=result)]
-        
-        elif tool_name == "get_agent":
-            agent = await asyncio.to_thread(
-                agents_api.get_agent,
-                agent_id=params["agent_id"]
+        }
+    }
+)
+async def customer_360(params: dict) -> list:
+    api = get_instance()
+    email = params.get("email")
+    contact_id = params.get("contact_id")
+    if not email and not contact_id:
+        raise ToolInputError("Invalid arguments for customer_360: pass email or contact_id")
+
+    async def lookup_contact():
+        if contact_id:
+            return await api.response_cache.get_or_fetch(
+                "contact", contact_id, lambda: api.contacts_api.get_specific_contact(contact_id=contact_id)
             )
-            
-            return [TextContent(type="text", text=format_agent(agent))]
-        
-        elif tool_name == "list_contacts":
-            # Build filters for contacts
-            kwargs = {
-                "per_page": params.get("limit", 20),
-                "page": (params.get("offset", 0) // params.get("limit", 20)) + 1
+        contacts = await find_contacts_by_email(api, email)
+        return contacts[0] if contacts else None
+
+    async def lookup_company():
+        # Starts as soon as the contact is known, while the tickets are still loading
+        try:
+            contact = await contact_task
+        except Exception:
+            # Reported with the contact
+            return None
+        company_id = getattr(contact, "company_id", None) if contact is not None else None
+        if not company_id:
+            return None
+        return await api.response_cache.get_or_fetch(
+            "company", company_id, lambda: api.companies_api.get_company(company_id=company_id)
+        )
+
+    async def lookup_tickets():
+        # Tickets are looked up by contact when the contact ID is given, else by email
+        filters = {"owner_contactid": contact_id} if contact_id else {"owner_email": email}
+        return await api.tickets_api.get_tickets_list(
+            filters=json.dumps(filters), sort_field="date_changed", sort_dir="DESC",
+            per_page=params.get("ticket_limit", 10), page=1
+        ) or []
+
+    contact_task = asyncio.ensure_future(lookup_contact())
+    contact, company, tickets = await asyncio.gather(
+        contact_task, lookup_company(), lookup_tickets(), return_exceptions=True
+    )
+
+    def failed(what: str, error: BaseException) -> str:
+        reason = format_api_error(error) if isinstance(error, ApiException) else str(error)
+        return f"{what}: lookup failed ({reason})"
+
+    sections = []
+    if isinstance(contact, BaseException):
+        sections.append(failed("Contact", contact))
+    elif contact is None:
+        sections.append(f"Contact: no contact with email {email}")
+    else:
+        sections.append(format_contact(contact))
+
+    if isinstance(company, BaseException):
+        sections.append(failed("Company", company))
+    elif company is not None:
+        # Company records vary a lot between accounts, so empty fields are left out
+        values = ((label, getter(company)) for _, (label, getter) in COMPANY_FIELDS.items())
+        sections.append("\n".join(f"{label}: {value}" for label, value in values if value))
+
+    if isinstance(tickets, BaseException):
+        sections.append(failed("Tickets", tickets))
+    elif not tickets:
+        sections.append("Tickets: none")
+    else:
+        tickets = annotate_tickets(api, tickets)
+        statuses = Counter(TICKET_FIELDS["status"][1](t) for t in tickets)
+        summary = ", ".join(f"{status} {count}" for status, count in statuses.most_common())
+        sections.append(f"Recent tickets ({summary}):\n" + render(tickets, "table", CUSTOMER_TICKET_FIELDS))
+
+    return [TextContent(type="text", text="\n\n".join(sections))]
+
+@tools.tool(
+    name="list_departments",
+    description="List all departments",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "limit": {
+                "type": "integer",
+                "description": "Number of results to return (default: 20)",
+                "default": 20,
+                "minimum": 1
+            },
+            **output_schema(DEPARTMENT_FIELDS)
+        }
+    }
+)
+async def list_departments(params: dict) -> list:
+    api = get_instance()
+    fmt, selected = output_options(params, DEPARTMENT_FIELDS)
+    # Get all departments, the API doesn't support limit parameter
+    if api.directory is not None and api.directory.is_loaded:
+        departments = api.directory.departments
+    else:
+        departments = await api.response_cache.get_or_fetch(
+            "departments", None, api.departments_api.get_department_list
+        )
+
+    # Apply client-side limit
+    limit = params.get("limit", 20)
+    departments = departments[:limit] if departments else []
+
+    if not departments:
+        return [TextContent(type="text", text="No departments found.")]
+
+    result = f"Found {len(departments)} departments:\n\n" + render(departments, fmt, selected, "-" * 30)
+
+    return [TextContent(type="text", text=result)]
+
+@tools.tool(
+    name="search_tickets",
+    description="Search tickets by query",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Search query"
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Number of results to return (default: 20)",
+                "default": 20,
+                "minimum": 1
+            },
+            "page_size": PAGE_SIZE_SCHEMA,
+            **output_schema(TICKET_FIELDS)
+        },
+        "required": ["query"]
+    }
+)
+async def search_tickets(params: dict) -> list:
+    api = get_instance()
+    fmt, selected = output_options(params, TICKET_FIELDS)
+    tickets = None
+    if api.ticket_mirror is not None and api.ticket_mirror.is_fresh():
+        # Ranked full-text match over subject and messages from the local mirror
+        try:
+            tickets = await api.ticket_mirror.search(params["query"], params.get("limit", 20))
+        except sqlite3.Error as e:
+            print(f"Ticket mirror search failed, using remote search: {e}", file=sys.stderr)
+
+    if tickets is None:
+        # Use list tickets with filters to search - use LIKE operator for partial match
+        filters = [["subject", "LIKE", f"%{params['query']}%"]]
+        tickets = await api.tickets_api.get_tickets_list(
+            filters=json.dumps(filters),
+            per_page=params.get("limit", 20),
+            page=1
+        )
+
+    if not tickets:
+        return [TextContent(type="text", text="No tickets found matching your search.")]
+
+    tickets = annotate_tickets(api, tickets)
+    title = f"Found {len(tickets)} tickets matching '{params['query']}'"
+    paged = page_results(api, tickets, params, fmt, selected, "-" * 50, "tickets", title)
+    if paged is not None:
+        return paged
+    result = f"{title}:\n\n" + render(tickets, fmt, selected, "-" * 50)
+
+    return [TextContent(type="text", text=result)]
+
+@tools.tool(
+    name="next_page",
+    description="Read the next page of a large list_tickets, search_tickets or list_contacts result, "
+                "served from the server's memory without querying LiveAgent again",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "cursor": {
+                "type": "string",
+                "description": "Cursor returned with the previous page"
             }
-            
-            # For contacts, we might need to use advanced filter format
-            filters = []
-            if params.get("search"):
-                # Search in name fields
-                filters.append(["firstname", "LIKE", f"%{params['search']}%"])
-            if params.get("email"):
-                # Search by exact email
-                filters.append(["emails", "=", params["email"]])
-                
-            if filters:
-                kwargs["filters"] = json.dumps(filters)
-            
-            contacts = await asyncio.to_thread(
-                contacts_api.get_contacts_list,
-                **kwargs
-            )
-            
-            if not contacts:
-                return [TextContent(type="text", text="No contacts found.")]
-            
-            result = f"Found {len(contacts)} contacts:\n\n"
-            for contact in contacts:
-                result += format_contact(contact) + "\n" + "-" * 30 + "\n"
-            
-            return [TextContent(type="text", text=result)]
-        
-        elif tool_name == "get_contact":
-            contact = await asyncio.to_thread(
-                contacts_api.get_specific_contact,
-                contact_id=params["contact_id"]
-            )
-            
-            return [TextContent(type="text", text=format_contact(contact))]
-        
-        elif tool_name == "create_contact":
-            # Create contact object - note that email should be in a list
-            contact_data = liveagent_api.ContactRequest()
-            
-            # Email should be provided as a list
-            contact_data.emails = [params["email"]]
-            
-            if "firstname" in params:
-                contact_data.firstname = params["firstname"]
-            if "lastname" in params:
-                contact_data.lastname = params["lastname"]
-            if "phone" in params:
-                # Phone should be provided as a list
-                contact_data.phones = [params["phone"]]
-            if "company_id" in params:
-                contact_data.company_id = params["company_id"]
-            if "gender" in params:
-                # Map gender to proper code
-                gender_map = {
-                    'male': 'M', 'female': 'F', 'other': 'O', 'unspecified': 'X'
-                }
-                contact_data.gender = gender_map.get(params["gender"].lower(), 'X')
-            if "city" in params:
-                contact_data.city = params["city"]
-            if "language" in params:
-                contact_data.language = params["language"]
-            if "note" in params:
-                contact_data.note = params["note"]
-            
-            contact = await asyncio.to_thread(
-                contacts_api.create_contact,
-                contact=contact_data
-            )
-            
-            return [TextContent(type="text", text=f"Contact created successfully!\n\n{format_contact(contact)}")]
-        
-        elif tool_name == "list_departments":
-            # Get all departments, the API doesn't support limit parameter
-            departments = await asyncio.to_thread(
-                departments_api.get_department_list
-            )
-            
-            # Apply client-side limit
-            limit = params.get("limit", 20)
-            departments = departments[:limit] if departments else []
-            
-            if not departments:
-                return [TextContent(type="text", text="No departments found.")]
-            
-            result = f"Found {len(departments)} departments:\n\n"
-            for dept in departments:
-                dept_info = f"ID: {getattr(dept, 'id', 'N/A')}\n"
-                dept_info += f"Name: {getattr(dept, 'name', 'N/A')}\n"
-                dept_info += f"Description: {getattr(dept, 'description', 'N/A')}\n"
-                result += dept_info + "-" * 30 + "\n"
-            
-            return [TextContent(type="text", text=result)]
-        
-        elif tool_name == "search_tickets":
-            # Use list tickets with filters to search - use LIKE operator for partial match
-            filters = [["subject", "LIKE", f"%{params['query']}%"]]
-            tickets = await asyncio.to_thread(
-                tickets_api.get_tickets_list,
-                filters=json.dumps(filters),
-                per_page=params.get("limit", 20),
-                page=1
-            )
-            
-            if not tickets:
-                return [TextContent(type="text", text="No tickets found matching your search.")]
-            
-            result = f"Found {len(tickets)} tickets matching '{params['query']}':\n\n"
-            for ticket in tickets:
-                result += format_ticket(ticket) + "\n" + "-" * 50 + "\n"
-            
-            return [TextContent(type="text", text=result)]
-        
-        else:
-            return [TextContent(type="text", text=f"Unknown tool: {tool_name}")]
-    
+        },
+        "required": ["cursor"]
+    }
+)
+async def next_page(params: dict) -> list:
+    api = get_instance()
+    result_id, offset = parse_cursor(params["cursor"])
+    result = api.result_store.get(result_id)
+    if result is None:
+        raise ToolInputError("This result has expired or was dropped to free memory, run the original query again")
+    if offset >= len(result.items):
+        return [TextContent(type="text", text=f"No more {result.noun}.")]
+    return result_page(result_id, result, offset, f"{len(result.items)} {result.noun}")
+
+@tools.tool(
+    name="tickets_changed_since",
+    description="List tickets created or changed since the previous call in this session, with the fields that changed. "
+                "The first call only starts watching unless since is given. A server without sessions (stateless HTTP) "
+                "needs since on every call: pass the watermark returned by the previous call.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "since": {
+                "type": "string",
+                "description": "Report changes at or after this date_changed (YYYY-MM-DD HH:MM:SS) instead of the session's watermark, "
+                               "e.g. the watermark returned by a previous call"
+            },
+            "department_id": {
+                "type": "string",
+                "description": "Only watch tickets of this department"
+            },
+            "max_items": {
+                "type": "integer",
+                "description": "Maximum number of changes to return; the rest is returned by the next call (default: LIVEAGENT_FETCH_ALL_MAX_ITEMS, 1000)",
+                "minimum": 1
+            },
+            **output_schema(TICKET_FIELDS)
+        }
+    }
+)
+async def tickets_changed_since(params: dict) -> list:
+    return await changed_tickets(params)
+
+async def changed_tickets(params: dict) -> list:
+    # Shared by the tool and the change resource; every session keeps its own watermark
+    api = get_instance()
+    fmt, selected = output_options(params, TICKET_FIELDS)
+    feed = api.change_feeds.get(current_session(), params.get("department_id"))
+    if params.get("since") is None and get_settings().stateless:
+        # The session, and its watermark, end with this request, so the client has to keep the watermark
+        await feed.ensure_started()
+        return [TextContent(
+            type="text",
+            text="This server doesn't keep sessions between requests, so ticket changes are only listed from a given time. "
+                 f"Call again with since=\"{feed.watermark}\" to get the changes made from now on."
+        )]
+    started = feed.watermark is not None or params.get("since") is not None
+    changes, more = await feed.poll(params.get("max_items", api.settings.fetch_all_max_items), params.get("since"))
+    watermark = f"Watermark: {feed.watermark or 'none'}"
+
+    if not started:
+        return [TextContent(type="text", text=f"Watching ticket changes from now on. {watermark}")]
+    if not changes:
+        return [TextContent(type="text", text=f"No ticket changes. {watermark}")]
+
+    for change, ticket in zip(changes, annotate_tickets(api, [change.ticket for change in changes])):
+        change.ticket = ticket
+    result = (f"{len(changes)} ticket changes{' (more remaining, call again)' if more else ''}. {watermark}\n\n"
+              + render(changes, fmt, change_columns(selected), "-" * 50))
+    return [TextContent(type="text", text=result)]
+
+def filter_live(records: list, params: dict) -> list:
+    if params.get("department_id"):
+        records = [r for r in records
+                   if (getattr(r, "departmentid", None) or getattr(r, "department_id", None)) == params["department_id"]]
+    if params.get("agent_id"):
+        records = [r for r in records
+                   if (getattr(r, "agentid", None) or getattr(r, "agent_id", None)) == params["agent_id"]]
+    return records[:params.get("limit", 50)]
+
+def render_live(kind: str, records: list, params: dict, spec) -> list:
+    api = get_instance()
+    fmt, selected = output_options(params, spec)
+    age = api.live_poller.age() or 0
+    if not records:
+        return [TextContent(type="text", text=f"No {kind} found (as of {age:.0f}s ago).")]
+
+    records = annotate_tickets(api, records)
+    result = f"Found {len(records)} {kind} (as of {age:.0f}s ago):\n\n" + render(records, fmt, selected, "-" * 30)
+    return [TextContent(type="text", text=result)]
+
+LIVE_FILTERS = {
+    "department_id": {
+        "type": "string",
+        "description": "Filter by department ID"
+    },
+    "agent_id": {
+        "type": "string",
+        "description": "Filter by agent ID"
+    },
+    "limit": {
+        "type": "integer",
+        "description": "Number of results to return (default: 50)",
+        "default": 50,
+        "minimum": 1
+    },
+}
+
+@tools.tool(
+    name="list_chats",
+    description="List the most recent chats. Answered from a background poll shared by all sessions, "
+                "subscribe to liveagent://chats to be notified of changes.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            **LIVE_FILTERS,
+            **output_schema(CHAT_FIELDS)
+        }
+    }
+)
+async def list_chats(params: dict) -> list:
+    chats = await get_instance().live_poller.get("chats")
+    return render_live("chats", filter_live(chats, params), params, CHAT_FIELDS)
+
+@tools.tool(
+    name="list_calls",
+    description="List calls waiting in the queue, ringing or in progress. Answered from a background poll shared "
+                "by all sessions, subscribe to liveagent://calls to be notified of changes.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "include_finished": {
+                "type": "boolean",
+                "description": "Also list recent finished and missed calls (default: false)",
+                "default": False
+            },
+            **LIVE_FILTERS,
+            **output_schema(CALL_FIELDS)
+        }
+    }
+)
+async def list_calls(params: dict) -> list:
+    calls = await get_instance().live_poller.get("calls")
+    if not params.get("include_finished"):
+        calls = [c for c in calls if getattr(c, "status", None) in ACTIVE_CALL_STATUSES]
+    return render_live("calls", filter_live(calls, params), params, CALL_FIELDS)
+
+@tools.tool(
+    name="aggregate_tickets",
+    description="Count tickets matching the filters by status, department, agent, channel and date bucket. "
+                "Scans all matching tickets on the server and returns only the counts.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "status": {
+                "type": "string",
+                "description": "Only count tickets with this status",
+                "enum": TICKET_STATUSES
+            },
+            "department_id": {
+                "type": "string",
+                "description": "Only count tickets of this department"
+            },
+            "agent_id": {
+                "type": "string",
+                "description": "Only count tickets assigned to this agent"
+            },
+            "date_field": {
+                "type": "string",
+                "description": "Date used by date_from, date_to and the date buckets (default: created)",
+                "enum": list(DATE_FIELDS),
+                "default": "created"
+            },
+            "date_from": {
+                "type": "string",
+                "description": "Only count tickets with date_field at or after this date (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)"
+            },
+            "date_to": {
+                "type": "string",
+                "description": "Only count tickets with date_field before this date (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)"
+            },
+            "group_by": {
+                "type": "array",
+                "description": f"Dimensions to count by, one rollup each (default: all): {', '.join(DIMENSIONS)}",
+                "items": {"type": "string", "enum": list(DIMENSIONS)}
+            },
+            "bucket": {
+                "type": "string",
+                "description": "Size of the date buckets (default: day)",
+                "enum": list(BUCKETS),
+                "default": "day"
+            },
+            "combine": {
+                "type": "boolean",
+                "description": "Count each combination of the group_by dimensions instead of one rollup per dimension (default: false)",
+                "default": False
+            },
+            "top": {
+                "type": "integer",
+                "description": "Only return the largest groups of each rollup (default: all)",
+                "minimum": 1
+            },
+            "max_items": {
+                "type": "integer",
+                "description": "Maximum number of tickets to scan (default: LIVEAGENT_AGGREGATE_MAX_ITEMS, 100000)",
+                "minimum": 1
+            },
+            "format": {
+                "type": "string",
+                "description": "Output format: text (default), json or table",
+                "enum": ["text", "json", "table"],
+                "default": "text"
+            }
+        }
+    }
+)
+async def aggregate_tickets(params: dict) -> list:
+    api = get_instance()
+    settings = api.settings
+
+    filters = []
+    if params.get("status"):
+        filters.append(["status", "=", TICKET_STATUS_CODES.get(params["status"].lower(), 'N')])
+    if params.get("department_id"):
+        filters.append(["departmentid", "=", params["department_id"]])
+    if params.get("agent_id"):
+        filters.append(["agentid", "=", params["agent_id"]])
+    date_field = params.get("date_field", "created")
+    if params.get("date_from"):
+        filters.append([DATE_FIELDS[date_field], ">=", params["date_from"]])
+    if params.get("date_to"):
+        filters.append([DATE_FIELDS[date_field], "<", params["date_to"]])
+
+    kwargs = {"sort_field": "date_created", "sort_dir": "ASC", "per_page": settings.page_size}
+    if filters:
+        kwargs["filters"] = json.dumps(filters)
+
+    aggregation = TicketAggregation(
+        params.get("group_by") or DIMENSIONS, date_field, params.get("bucket", "day"), params.get("combine", False)
+    )
+    max_items = params.get("max_items", settings.aggregate_max_items)
+    truncated = False
+    # Pages are counted as they arrive and then dropped; sorting by creation keeps
+    # pages stable while new tickets come in at the end. One ticket more than
+    # max_items is asked for, to tell whether any were left out
+    async for page in iter_pages(
+        lambda page: api.tickets_api.get_tickets_list(**kwargs, page=page),
+        settings.page_size, max_items=max_items + 1, concurrency=settings.page_concurrency
+    ):
+        remaining = max_items - aggregation.total
+        if len(page) > remaining:
+            truncated = True
+            aggregation.add(page[:remaining])
+            break
+        aggregation.add(page)
+        await report_progress(aggregation.total, max_items)
+
+    directory = api.directory if api.directory is not None and api.directory.is_loaded else None
+    rows = aggregation.rows(directory, params.get("top"))
+    note = f" (stopped after max_items={max_items}, counts are partial)" if truncated else ""
+
+    fmt = params.get("format") or "text"
+    if fmt == "json":
+        rollups: Dict[str, list] = {}
+        for name, labels, count in rows:
+            rollups.setdefault(name, []).append({"group": labels if aggregation.combine else labels[0], "count": count})
+        output = {"total": aggregation.total, "partial": truncated, "rollups": rollups}
+        if truncated:
+            output["note"] = note.strip(" ()")
+        result = json.dumps(output, separators=(",", ":"))
+    elif fmt == "table":
+        result = "\n".join([f"Counted {aggregation.total} tickets{note}", "", "rollup | group | count"] + [
+            f"{name} | {' / '.join(labels)} | {count}" for name, labels, count in rows
+        ])
+    else:
+        lines = [f"Counted {aggregation.total} tickets{note}"]
+        current = None
+        for name, labels, count in rows:
+            if name != current:
+                lines.append(f"\nBy {name}:")
+                current = name
+            lines.append(f"  {' / '.join(labels)}: {count}")
+        result = "\n".join(lines)
+
+    return [TextContent(type="text", text=result)]
+
+# Arguments are validated by the registry with precompiled validators, so the
+# per-call schema validation of the MCP server is skipped
+@server.call_tool(validate_input=False)
+async def handle_call_tool(name: str, arguments: dict) -> list:
+    arguments = dict(arguments or {})
+    try:
+        # Every call runs against the instance of its tenant, with that tenant's concurrency slots
+        with use_tenant(arguments.pop("tenant", None) or session_tenant()) as api:
+            return await tools.call(name, arguments, partition=api.name)
+
     except ApiException as e:
         return handle_api_error(e)
+    except (ToolInputError, ToolTimeoutError) as e:
+        return [TextContent(type="text", text=str(e))]
     except Exception as e:
         import traceback
-        import sys
         error_message = f"Unexpected error: {str(e)}\n\nFull traceback:\n{traceback.format_exc()}"
         print(f"Error in handle_call_tool: {error_message}", file=sys.stderr)
         return [TextContent(type="text", text=error_message)]
 
+@asynccontextmanager
+async def running_services(settings: Settings, metrics_endpoint: bool = True) -> AsyncIterator[Any]:
+    # Tenants, tool limits and background tasks for the lifetime of one server
+    # process, whatever the transport; everything is stopped and closed on exit
+    tenants = get_tenants()
+    tools.configure(
+        concurrency=settings.tool_concurrency,
+        timeouts=settings.tool_timeouts,
+        default_timeout=settings.tool_timeout,
+    )
+    if len(tenants.names) > 1:
+        tools.add_argument("tenant", {
+            "type": "string",
+            "enum": tenants.names,
+            "description": f"LiveAgent account to use (default: {tenants.default or 'the session tenant'})",
+        })
+
+    # Background syncs of the default tenant start now, those of other tenants on first use
+    tenants.start()
+    if tenants.default is not None:
+        tenants.get()
+
+    background_tasks = []
+    if settings.metrics_textfile:
+        print(f"Metrics textfile: {settings.metrics_textfile}", file=sys.stderr)
+        background_tasks.append(asyncio.create_task(
+            run_textfile_writer(settings.metrics_textfile, settings.metrics_interval)
+        ))
+    metrics_server = None
+    if settings.metrics_port and metrics_endpoint:
+        metrics_server = await start_http_server(settings.metrics_host, settings.metrics_port)
+        print(f"Metrics endpoint: http://{settings.metrics_host}:{settings.metrics_port}/metrics", file=sys.stderr)
+
+    try:
+        yield tenants
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        if metrics_server is not None:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+        await tenants.close()
+
 async def serve() -> None:
-    import sys
     from mcp.server.stdio import stdio_server
-    
+
+    settings = get_settings()
+    settings.validate()
+
     print(f"LiveAgent MCP Server starting...", file=sys.stderr)
-    print(f"Base URL: {BASE_URL}", file=sys.stderr)
-    print(f"API Key configured: {'Yes' if API_KEY else 'No'}", file=sys.stderr)
-    
+    if settings.tenants_file:
+        print(f"Tenants: {', '.join(get_tenants().names)}", file=sys.stderr)
+    else:
+        print(f"Base URL: {settings.base_url}", file=sys.stderr)
+        print(f"API Key configured: {'Yes' if settings.api_key else 'No'}", file=sys.stderr)
+
     options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options)
+    async with running_services(settings):
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options)
 
 def main():
-    asyncio.run(serve())
+    import argparse
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="liveagent-mcp", description="MCP server for the LiveAgent API")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=settings.transport,
+                        help="stdio for one client per process, http for many sessions (default: LIVEAGENT_TRANSPORT or stdio)")
+    parser.add_argument("--host", default=settings.http_host, help="HTTP bind address (default: LIVEAGENT_HTTP_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=settings.http_port, help="HTTP port (default: LIVEAGENT_HTTP_PORT or 8000)")
+    parser.add_argument("--workers", type=int, default=settings.http_workers,
+                        help="HTTP worker processes sharing the port (default: LIVEAGENT_HTTP_WORKERS or 1)")
+    args = parser.parse_args()
+
+    if args.transport == "http":
+        from .http_server import run_http
+
+        settings.transport = args.transport
+        settings.http_host, settings.http_port, settings.http_workers = args.host, args.port, args.workers
+        run_http(settings)
+    else:
+        asyncio.run(serve())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,177 @@
+import json
+import os
+from typing import Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def parse_mapping(value: str, convert: Callable[[str], T]) -> Dict[str, T]:
+    """Parse ``name=value,name=value`` into a dict, e.g. per-tool limits."""
+    result = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, raw = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected name=value, got {item.strip()!r}")
+        result[name.strip()] = convert(raw.strip())
+    return result
+
+
+class Settings:
+    """Server configuration read from ``LIVEAGENT_*`` environment variables."""
+
+    def __init__(self, env: Mapping[str, str] = os.environ):
+        self.base_url = env.get("LIVEAGENT_BASE_URL", "").rstrip("/")
+        self.api_key = env.get("LIVEAGENT_V3_API_KEY", "")
+        self.timeout = int(env.get("LIVEAGENT_TIMEOUT", "30"))
+        self.max_connections = int(env.get("LIVEAGENT_MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = int(env.get("LIVEAGENT_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.keepalive_expiry = float(env.get("LIVEAGENT_KEEPALIVE_EXPIRY", "30"))
+        self.rate_limit = float(env.get("LIVEAGENT_RATE_LIMIT", "3"))
+        self.rate_limit_burst = float(env.get("LIVEAGENT_RATE_LIMIT_BURST", "20"))
+        self.max_retries = int(env.get("LIVEAGENT_MAX_RETRIES", "3"))
+        self.retry_budget_ratio = float(env.get("LIVEAGENT_RETRY_BUDGET_RATIO", "0.2"))
+        self.hedge_operations = [name.strip() for name in env.get("LIVEAGENT_HEDGE_OPERATIONS", "").split(",")
+                                 if name.strip()]
+        self.hedge_quantile = float(env.get("LIVEAGENT_HEDGE_QUANTILE", "0.95"))
+        self.hedge_min_delay = float(env.get("LIVEAGENT_HEDGE_MIN_DELAY", "0.05"))
+        self.hedge_budget_ratio = float(env.get("LIVEAGENT_HEDGE_BUDGET_RATIO", "0.1"))
+        self.raw_records = env.get("LIVEAGENT_RAW_RECORDS", "true").lower() in ("1", "true", "yes")
+        self.cache_size = int(env.get("LIVEAGENT_CACHE_SIZE", "1024"))
+        self.cache_ttl_ticket = float(env.get("LIVEAGENT_CACHE_TTL_TICKET", "30"))
+        self.cache_ttl_agent = float(env.get("LIVEAGENT_CACHE_TTL_AGENT", "300"))
+        self.cache_ttl_contact = float(env.get("LIVEAGENT_CACHE_TTL_CONTACT", "120"))
+        self.cache_ttl_department = float(env.get("LIVEAGENT_CACHE_TTL_DEPARTMENT", "600"))
+        self.page_size = int(env.get("LIVEAGENT_PAGE_SIZE", "100"))
+        self.page_concurrency = int(env.get("LIVEAGENT_PAGE_CONCURRENCY", "4"))
+        self.fetch_all_max_items = int(env.get("LIVEAGENT_FETCH_ALL_MAX_ITEMS", "1000"))
+        self.aggregate_max_items = int(env.get("LIVEAGENT_AGGREGATE_MAX_ITEMS", "100000"))
+        self.result_page_size = int(env.get("LIVEAGENT_RESULT_PAGE_SIZE", "50"))
+        self.result_store_bytes = int(env.get("LIVEAGENT_RESULT_STORE_BYTES", str(64 * 1024 * 1024)))
+        self.result_ttl = float(env.get("LIVEAGENT_RESULT_TTL", "900"))
+        self.idempotency_ttl = float(env.get("LIVEAGENT_IDEMPOTENCY_TTL", "600"))
+        self.idempotency_max_entries = int(env.get("LIVEAGENT_IDEMPOTENCY_MAX_ENTRIES", "1000"))
+        self.idempotency_hash = env.get("LIVEAGENT_IDEMPOTENCY_HASH", "true").lower() in ("1", "true", "yes")
+        self.batch_concurrency = int(env.get("LIVEAGENT_BATCH_CONCURRENCY", "10"))
+        self.message_cache_dir = env.get("LIVEAGENT_MESSAGE_CACHE_DIR", "")
+        self.message_cache_pages = int(env.get("LIVEAGENT_MESSAGE_CACHE_PAGES", "1024"))
+        self.mirror_path = env.get("LIVEAGENT_MIRROR_PATH", "")
+        self.mirror_sync_interval = float(env.get("LIVEAGENT_MIRROR_SYNC_INTERVAL", "60"))
+        self.mirror_max_staleness = float(env.get("LIVEAGENT_MIRROR_MAX_STALENESS", "300"))
+        self.contact_index = env.get("LIVEAGENT_CONTACT_INDEX", "").lower() in ("1", "true", "yes")
+        self.contact_index_sync_interval = float(env.get("LIVEAGENT_CONTACT_INDEX_SYNC_INTERVAL", "120"))
+        self.contact_index_max_staleness = float(env.get("LIVEAGENT_CONTACT_INDEX_MAX_STALENESS", "600"))
+        self.live_poll_min_interval = float(env.get("LIVEAGENT_LIVE_POLL_MIN_INTERVAL", "2"))
+        self.live_poll_max_interval = float(env.get("LIVEAGENT_LIVE_POLL_MAX_INTERVAL", "30"))
+        self.live_poll_limit = int(env.get("LIVEAGENT_LIVE_POLL_LIMIT", "100"))
+        self.change_poll_interval = float(env.get("LIVEAGENT_CHANGE_POLL_INTERVAL", "30"))
+        self.change_feed_max_tracked = int(env.get("LIVEAGENT_CHANGE_FEED_MAX_TRACKED", "10000"))
+        self.directory_refresh_interval = float(env.get("LIVEAGENT_DIRECTORY_REFRESH_INTERVAL", "300"))
+        self.tool_timeout = float(env.get("LIVEAGENT_TOOL_TIMEOUT", "0"))
+        self.tool_timeouts = parse_mapping(env.get("LIVEAGENT_TOOL_TIMEOUTS", ""), float)
+        self.tool_concurrency = parse_mapping(env.get("LIVEAGENT_TOOL_CONCURRENCY", ""), int)
+        self.metrics_textfile = env.get("LIVEAGENT_METRICS_TEXTFILE", "")
+        self.metrics_interval = float(env.get("LIVEAGENT_METRICS_INTERVAL", "15"))
+        self.metrics_host = env.get("LIVEAGENT_METRICS_HOST", "127.0.0.1")
+        self.metrics_port = int(env.get("LIVEAGENT_METRICS_PORT", "0"))
+        self.transport = env.get("LIVEAGENT_TRANSPORT", "stdio")
+        self.http_host = env.get("LIVEAGENT_HTTP_HOST", "127.0.0.1")
+        self.http_port = int(env.get("LIVEAGENT_HTTP_PORT", "8000"))
+        self.http_path = env.get("LIVEAGENT_HTTP_PATH", "/mcp")
+        self.http_workers = int(env.get("LIVEAGENT_HTTP_WORKERS", "1"))
+        self.http_stateless = env.get("LIVEAGENT_HTTP_STATELESS", "").lower() in ("1", "true", "yes")
+        self.http_shutdown_timeout = float(env.get("LIVEAGENT_HTTP_SHUTDOWN_TIMEOUT", "30"))
+        self.tenants_file = env.get("LIVEAGENT_TENANTS_FILE", "")
+
+    @property
+    def stateless(self) -> bool:
+        # Every request is a session of its own, so nothing is kept between calls of a client
+        return self.transport == "http" and (self.http_stateless or self.http_workers > 1)
+
+    def validate(self) -> None:
+        if self.tenants_file:
+            load_tenants(self.tenants_file)
+        elif not self.base_url or not self.api_key:
+            raise ValueError("LIVEAGENT_BASE_URL and LIVEAGENT_V3_API_KEY must be set")
+
+
+# Settings of the whole process rather than of one LiveAgent account
+PROCESS_SETTINGS = ("tool_", "metrics_", "transport", "http_", "tenant")
+
+
+def _env_name(key: str) -> str:
+    # Tenant settings use the environment variable names without the prefix, e.g. rate_limit
+    if key.upper() == "API_KEY":
+        return "LIVEAGENT_V3_API_KEY"
+    return "LIVEAGENT_" + key.upper()
+
+
+def _scalar(value: object) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        raise ValueError(f"Expected a single value, got {json.dumps(value)}")
+    return str(value)
+
+
+def _env_value(value: object) -> str:
+    # Written the way the environment variable would be: lists comma-separated, mappings as name=value
+    if isinstance(value, list):
+        return ",".join(_scalar(item) for item in value)
+    if isinstance(value, dict):
+        return ",".join(f"{k}={_scalar(v)}" for k, v in value.items())
+    return _scalar(value)
+
+
+def load_tenants(path: str, env: Mapping[str, str] = os.environ) -> Tuple[Dict[str, Settings], Optional[str]]:
+    """Settings of every tenant in a JSON tenants file and the name of the default one.
+
+    The file looks like ``{"default": "acme", "tenants": {"acme": {"base_url": ...,
+    "api_key": ..., "rate_limit": 5}}}``. A tenant's values override the
+    ``LIVEAGENT_*`` environment, which supplies everything a tenant doesn't set.
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    known = {name for name in vars(Settings({})) if not name.startswith(PROCESS_SETTINGS)}
+    tenants: Dict[str, Settings] = {}
+    for name, values in (config.get("tenants") or {}).items():
+        unknown = [key for key in values if key.lower() not in known]
+        if unknown:
+            raise ValueError(f"Unknown settings for tenant {name!r}: {', '.join(unknown)}")
+        try:
+            settings = Settings(dict(env, **{_env_name(key): _env_value(value) for key, value in values.items()}))
+        except ValueError as e:
+            raise ValueError(f"Invalid settings for tenant {name!r}: {e}") from None
+        if not settings.base_url or not settings.api_key:
+            raise ValueError(f"Tenant {name!r} needs base_url and api_key")
+        tenants[name] = settings
+    if not tenants:
+        raise ValueError(f"No tenants in {path}")
+
+    # Files on disk would be shared by accounts whose IDs can collide
+    for attribute in ("mirror_path", "message_cache_dir"):
+        paths = [getattr(settings, attribute) for settings in tenants.values() if getattr(settings, attribute)]
+        if len(paths) != len(set(paths)):
+            raise ValueError(f"Every tenant needs its own {attribute}")
+
+    default = env.get("LIVEAGENT_TENANT") or config.get("default")
+    if default is None and len(tenants) == 1:
+        default = next(iter(tenants))
+    if default is not None and default not in tenants:
+        raise ValueError(f"Default tenant {default!r} is not in {path}")
+    return tenants, default
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Load settings on first use, including values from a ``.env`` file."""
+    global _settings
+    if _settings is None:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _settings = Settings()
+    return _settings
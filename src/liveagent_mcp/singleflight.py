@@ -0,0 +1,64 @@
+import asyncio
+from typing import Any, Callable, Coroutine, Dict, Hashable
+
+from .deadline import remaining, spawn
+from .errors import ToolTimeoutError
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one in-flight call.
+
+    Every caller awaiting a key receives the result (or the exception) of the
+    single shared call. The call runs without the deadline of the caller that
+    started it; each caller instead stops waiting at its own deadline. A caller
+    being cancelled or timing out does not cancel the call for the others; it is
+    only cancelled once no caller is left waiting for it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Coroutine[Any, Any, Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = spawn(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        self._waiters[key] += 1
+        try:
+            left = remaining()
+            if left is None:
+                return await asyncio.shield(task)
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), max(0.0, left))
+            except asyncio.TimeoutError:
+                if task.done():
+                    # Finished as the wait timed out, or timed out itself
+                    return task.result()
+                self._leave(key, task)
+                raise ToolTimeoutError("Deadline passed while waiting for a shared call") from None
+        except asyncio.CancelledError:
+            self._leave(key, task)
+            raise
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _leave(self, key: Hashable, task: asyncio.Task) -> None:
+        # The last caller to stop waiting cancels the call
+        if not task.done() and self._waiters.get(key) == 1 and self._calls.get(key) is task:
+            task.cancel()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Type
+from urllib.parse import quote
+
+import httpx
+import liveagent_api
+
+from .deadline import remaining
+from .errors import ApiException, ToolTimeoutError
+from .metrics import track_upstream
+from .records import ContactRecord, Record, TicketRecord
+from .ratelimit import HedgePolicy, RateLimiter, RetryPolicy, parse_retry_after
+from .singleflight import SingleFlight
+
+
+# Python keyword arguments of the generated SDK mapped to LiveAgent v3 query parameters
+QUERY_PARAMS = {
+    "page": "_page",
+    "per_page": "_perPage",
+    "_from": "_from",
+    "to": "_to",
+    "filters": "_filters",
+    "sort_field": "_sortField",
+    "sort_dir": "_sortDir",
+    "cursor": "_cursor",
+}
+
+
+class _RawResponse:
+    # ApiClient.deserialize() only needs the response text on a `data` attribute
+    def __init__(self, data: str):
+        self.data = data
+
+
+class AsyncApiClient:
+    """Asyncio client for the LiveAgent v3 API backed by a pooled ``httpx.AsyncClient``.
+
+    Connections are kept alive and reused across calls, so many tool calls can be
+    in flight on one event loop. Request bodies and responses are (de)serialized
+    with the generated SDK models, so handlers receive the same objects as before,
+    except that with ``raw_records`` the ticket and contact lists are parsed into
+    slotted records (see ``records.py``). Concurrent identical GET requests share a single upstream call. Every attempt
+    takes a token from the optional shared ``rate_limiter`` and failed attempts are
+    retried according to ``retry_policy``. Slow reads of the operations in
+    ``hedge_policy`` are sent a second time. Within a tool call with a deadline,
+    attempts time out at the deadline and retries that can't finish before it
+    are not made; a caller of a shared GET instead stops waiting at its own
+    deadline. A cancelled call closes its request.
+    """
+
+    def __init__(self, configuration: "liveagent_api.Configuration",
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 raw_records: bool = True):
+        self.configuration = configuration
+        self.raw_records = raw_records
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.hedge_policy = hedge_policy
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._sdk_client = liveagent_api.ApiClient(configuration)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight = SingleFlight()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.configuration.host,
+                headers={
+                    "apikey": self.configuration.api_key["apikey"],
+                    "Accept": "application/json",
+                },
+                timeout=self.configuration.request_timeout,
+                limits=self.limits,
+            )
+        return self._client
+
+    async def call_api(self, method: str, path: str,
+                       path_params: Optional[Dict[str, Any]] = None,
+                       query_params: Optional[Dict[str, Any]] = None,
+                       body: Any = None,
+                       response_type: Optional[str] = None,
+                       operation: Optional[str] = None,
+                       record_type: Optional[Type[Record]] = None) -> Any:
+        # `operation` names the API method in metrics, e.g. "tickets.get_ticket".
+        # With `record_type` (and raw_records on) a list response is parsed straight
+        # into those records instead of SDK models
+        if not self.raw_records:
+            record_type = None
+        operation = operation or f"{method} {path}"
+        if path_params:
+            path = path.format(**{k: quote(str(v), safe="") for k, v in path_params.items()})
+
+        params = {}
+        for key, value in (query_params or {}).items():
+            if value is not None:
+                params[QUERY_PARAMS.get(key, key)] = value
+
+        if method == "GET":
+            # A shared call isn't bound by any caller's deadline; each caller stops waiting at its own
+            key = (path, tuple(sorted((k, str(v)) for k, v in params.items())), response_type, record_type)
+            fetch = lambda: self._request(method, path, params, None, response_type, operation, record_type)
+            if self.hedge_policy is not None and self.hedge_policy.applies(operation):
+                return await self._inflight.do(key, lambda: self.hedge_policy.run(operation, fetch))
+            return await self._inflight.do(key, fetch)
+        return await self._request(method, path, params, body, response_type, operation, record_type)
+
+    async def _request(self, method: str, path: str, params: Dict[str, Any],
+                       body: Any, response_type: Optional[str], operation: str,
+                       record_type: Optional[Type[Record]] = None) -> Any:
+        content = None
+        headers = {}
+        if body is not None:
+            content = json.dumps(self._sdk_client.sanitize_for_serialization(body))
+            headers["Content-Type"] = "application/json"
+
+        if self.retry_policy is not None and self.retry_policy.budget is not None:
+            self.retry_policy.budget.record_request()
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+
+            timeout = self.configuration.request_timeout
+            left = remaining()
+            if left is not None:
+                if left <= 0:
+                    raise ToolTimeoutError(f"Deadline passed before {operation} was sent")
+                timeout = min(timeout, left) if timeout else left
+
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                with track_upstream(operation) as tracked:
+                    response = await self._get_client().request(
+                        method, path, params=params, content=content, headers=headers, timeout=timeout
+                    )
+                    tracked.status = response.status_code
+            except httpx.HTTPError as e:
+                error = ApiException(status=0, reason=f"{type(e).__name__}: {e}")
+            else:
+                if 200 <= response.status_code <= 299:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.on_success()
+                    if self.hedge_policy is not None:
+                        self.hedge_policy.observe(operation, time.perf_counter() - started)
+                    break
+                error = ApiException(
+                    status=response.status_code,
+                    reason=response.reason_phrase,
+                    body=response.text,
+                    headers=dict(response.headers),
+                )
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429 and self.rate_limiter is not None:
+                    self.rate_limiter.on_throttle(retry_after)
+
+            if self.retry_policy is None or not self.retry_policy.should_retry(method, error.status, attempt):
+                raise error
+            attempt += 1
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            left = remaining()
+            if left is not None and delay >= left:
+                # The retry couldn't finish in time, the actual error is more useful than a timeout
+                raise error
+            await asyncio.sleep(delay)
+
+        if response_type is None or not response.content:
+            return None
+        if record_type is not None:
+            return record_type.from_json(response.content)
+        return self._sdk_client.deserialize(_RawResponse(response.text), response_type)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class AsyncTicketsApi:
+    def __init__(self, api_client: AsyncApiClient):
+        self.api_client = api_client
+
+    async def get_tickets_list(self, **kwargs) -> Any:
+        return await self.api_client.call_api(
+            "GET", "/tickets", query_params=kwargs, response_type="list[TicketListItem]",
+            operation="tickets.get_tickets_list", record_type=TicketRecord
+        )
+
+    async def get_ticket(self, ticket_id: str) -> Any:
+        return await self.api_client.call_api(
+            "GET", "/tickets/{ticketId}", path_params={"ticketId": ticket_id}, response_type="Ticket",
+            operation="tickets.get_ticket"
+        )
+
+    async def create_ticket(self, ticket: Any) -> Any:
+        return await self.api_client.call_api(
+            "POST", "/tickets", body=ticket, response_type="Ticket",
+            operation="tickets.create_ticket"
+        )
+
+    async def update_ticket(self, ticket_id: str, ticket: Any) -> Any:
+        return await self.api_client.call_api(
+            "PUT", "/tickets/{ticketId}", path_params={"ticketId": ticket_id},
+            body=ticket, response_type="Ticket",
+            operation="tickets.update_ticket"
+        )
+
+
+class AsyncAgentsApi:
+    def __init__(self, api_client: AsyncApiClient):
+        self.api_client = api_client
+
+    async def get_agents(self, **kwargs) -> Any:
+        return await self.api_client.call_api(
+            "GET", "/agents", query_params=kwargs, response_type="list[Agent]",
+            operation="agents.get_agents"
+        )
+
+    async def get_agent(self, agent_id: str) -> Any:
+        return await self.api_client.call_api(
+            "GET", "/agents/{agentId}", path_params={"agentId": agent_id}, response_type="Agent",
+            operation="agents.get_agent"
+        )
+
+
+class AsyncContactsApi:
+    def __init__(self, api_client: AsyncApiClient):
+        self.api_client = api_client
+
+    async def get_contacts_list(self, **kwargs) -> Any:
+        return await self.api_client.call_api(
+            "GET", "/contacts", query_params=kwargs, response_type="list[ContactListItem]",
+            operation="contacts.get_contacts_list", record_type=ContactRecord
+        )
+
+    async def get_specific_contact(self, contact_id: str) -> Any:
+        return await self.api_client.call_api(
+            "GET", "/contacts/{contactId}", path_params={"contactId": contact_id}, response_type="Contact",
+            operation="contacts.get_specific_contact"
+        )
+
+    async def create_contact(self, contact: Any) -> Any:
+        return await self.api_client.call_api(
+            "POST", "/contacts", body=contact, response_type="Contact",
+            operation="contacts.create_contact"
+        )
+
+
+class AsyncDepartmentsApi:
+    def __init__(self, api_client: AsyncApiClient):
+        self.api_client = api_client
+
+    async def get_department_list(self, **kwargs) -> Any:
+        return await self.api_client.call_api(
+            "GET", "/departments", query_params=kwargs, response_type="list[Department]",
+            operation="departments.get_department_list"
+        )
+
+
+class AsyncMessagesApi:
+    def __init__(self, api_client: AsyncApiClient):
+        self.api_client = api_client
+
+    async def get_ticket_messages_list(self, ticket_id: str, **kwargs) -> Any:
+        return await self.api_client.call_api(
+            "GET", "/tickets/{ticketId}/messages", path_params={"ticketId": ticket_id},
+            query_params=kwargs, response_type="list[MessageGroup]",
+            operation="messages.get_ticket_messages_list"
+        )
+
+
+def _records(data: Any) -> Any:
+    # Chats, calls and companies are requested as plain objects rather than SDK models, so
+    # they are wrapped for attribute access like the other records
+    if isinstance(data, list):
+        return [SimpleNamespace(**item) if isinstance(item, dict) else item for item in data]
+    return data
+
+
+class AsyncChatsApi:
+    def __init__(self, api_client: AsyncApiClient):
+        self.api_client = api_client
+
+    async def get_chats_list(self, **kwargs) -> Any:
+        return _records(await self.api_client.call_api(
+            "GET", "/chats", query_params=kwargs, response_type="list[object]",
+            operation="chats.get_chats_list"
+        ))
+
+
+class AsyncCallsApi:
+    def __init__(self, api_client: AsyncApiClient):
+        self.api_client = api_client
+
+    async def get_calls_list(self, **kwargs) -> Any:
+        return _records(await self.api_client.call_api(
+            "GET", "/calls", query_params=kwargs, response_type="list[object]",
+            operation="calls.get_calls_list"
+        ))
+
+
+class AsyncCompaniesApi:
+    def __init__(self, api_client: AsyncApiClient):
+        self.api_client = api_client
+
+    async def get_company(self, company_id: str) -> Any:
+        return _records([await self.api_client.call_api(
+            "GET", "/companies/{companyId}", path_params={"companyId": company_id}, response_type="object",
+            operation="companies.get_company"
+        )])[0]
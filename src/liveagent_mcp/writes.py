@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from .deadline import spawn
+from .errors import ApiException
+
+# Arguments that only change how a result is shown, not what is written
+PRESENTATION_ARGUMENTS = ("idempotency_key", "format", "fields")
+
+
+def write_key(tool: str, params: dict, hash_content: bool) -> Optional[Tuple[str, str, str]]:
+    """Key of a write: its idempotency_key, else a hash of its arguments if ``hash_content``."""
+    if params.get("idempotency_key"):
+        return tool, "key", params["idempotency_key"]
+    if not hash_content:
+        return None
+    content = {k: v for k, v in params.items() if k not in PRESENTATION_ARGUMENTS}
+    digest = hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+    return tool, "hash", digest
+
+
+class WriteResults:
+    """Bounded store of recent write results, keyed by idempotency key.
+
+    A write whose key was seen within ``ttl`` seconds returns the stored result
+    without running again, and a repeat that arrives while the first write is
+    still running waits for it. The write itself is shielded, so a caller that
+    times out or is cancelled doesn't abandon a write the API may already have
+    applied; the retry picks up its result. Failed writes are not stored.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._running: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def _get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] < time.monotonic():
+            del self._results[key]
+            return False, None
+        return True, entry[1]
+
+    def _store(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._running.get(key) is task:
+            del self._running[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._results[key] = (time.monotonic() + self.ttl, task.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    async def run(self, key: Hashable, write: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of the write and whether it is a repeat of an earlier one."""
+        found, result = self._get(key)
+        if found:
+            self.hits += 1
+            return result, True
+        task = self._running.get(key)
+        repeated = task is not None
+        if task is None:
+            # Not cut short by the deadline of the call, a retry must find the outcome
+            task = spawn(write())
+            self._running[key] = task
+            task.add_done_callback(lambda t: self._store(key, t))
+        if repeated:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return await asyncio.shield(task), repeated
+
+
+class _Batch:
+    __slots__ = ("changes", "parts")
+
+    def __init__(self):
+        self.changes: Dict[str, Any] = {}
+        # The changes and result of every caller in the batch
+        self.parts: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+
+    def add(self, changes: Dict[str, Any]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        # Retrieved here too, in case the caller was cancelled
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.changes.update(changes)
+        self.parts.append((changes, future))
+        return future
+
+
+def _settle(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class EntityQueue:
+    """Serializes writes to the same entity and merges the ones waiting in line.
+
+    Writes to one entity run one at a time. Writes that arrive while another is
+    running are merged into a single pending batch, later values winning per
+    field, which is applied with one request once the running write finishes.
+    Every caller of a batch gets its result. If the API rejects a merged batch
+    (4xx), its writes are applied one by one, so one caller's invalid change
+    doesn't fail the others.
+    """
+
+    def __init__(self):
+        self.merged = 0
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._pending: Dict[Hashable, _Batch] = {}
+        self._users: Dict[Hashable, int] = {}
+        # Referenced until done, the event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def _apply(self, key: Hashable, batch: _Batch, apply: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+        try:
+            async with self._locks[key]:
+                # From here on new writes start the next batch
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+                try:
+                    result = await apply(batch.changes)
+                except ApiException as e:
+                    if len(batch.parts) == 1 or not (e.status and 400 <= e.status < 500):
+                        raise
+                    for changes, future in batch.parts:
+                        try:
+                            _settle(future, await apply(changes))
+                        except Exception as part_error:
+                            _settle(future, error=part_error)
+                    return
+                for _, future in batch.parts:
+                    _settle(future, result)
+        except Exception as e:
+            for _, future in batch.parts:
+                _settle(future, error=e)
+        finally:
+            for _, future in batch.parts:
+                if not future.done():
+                    future.cancel()
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+    async def submit(self, key: Hashable, changes: Dict[str, Any],
+                     apply: Callable[[Dict[str, Any]], Awaitable[Any]]) -> Any:
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch()
+            self._locks.setdefault(key, asyncio.Lock())
+            self._users[key] = self._users.get(key, 0) + 1
+            task = spawn(self._apply(key, batch, apply))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self.merged += 1
+        return await asyncio.shield(batch.add(changes))